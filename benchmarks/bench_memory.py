@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Peak memory and throughput of one transfer.main() round by wallet count,
+with and without streaming (STREAM_CHUNK), against the local mock chain.
+Every round runs in a fresh process so its RSS is measured alone.
+
+Usage: python benchmarks/bench_memory.py [--sizes 1000 10000 100000] [--modes stream full] ...
+
+Memory is sampled from /proc/self/status (Linux), elsewhere only the
+peak RSS of the whole process is known. Loading a wallet file validates
+every key once, which is slow for big files, so the load is reported
+on its own and not counted in the round.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Round memory benchmark on a mock chain")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="wallet counts")
+    parser.add_argument("--modes", nargs="+", choices=("stream", "full"),
+                        default=["stream", "full"])
+    parser.add_argument("--chunk", type=int, default=1000, help="STREAM_CHUNK in stream mode")
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--tx-per-wallet", dest="tx_per_wallet", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.005, help="seconds per RPC request")
+    parser.add_argument("--block-time", dest="block_time", type=float, default=0.5)
+    parser.add_argument("--wallet-file", dest="wallet_file",
+                        help="existing wallet file to take the first wallets from")
+    parser.add_argument("--output", default=os.path.join(ROOT, "benchmarks", "results.jsonl"))
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+def rss_mb():
+    """
+    Current resident set size in MB, None where /proc is not available
+    """
+    try:
+        with open("/proc/self/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+class RssSampler:
+    """
+    Keeps the highest RSS seen while running
+    """
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = rss_mb()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            rss = rss_mb()
+            if rss is not None and (self.peak is None or rss > self.peak):
+                self.peak = rss
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+def run_child(settings):
+    """
+    One round in this process, prints its figures as a JSON line
+    """
+    import transfer
+    from executor import RoundTotals
+    transfer.RPC_URL = settings["url"]
+    transfer.WALLET_FILE = settings["wallet_file"]
+    transfer.JOURNAL_FILE = settings["journal_file"]
+    transfer.TX_PER_WALLET = settings["tx_per_wallet"]
+    transfer.MAX_WORKERS = settings["workers"]
+    transfer.STREAM_CHUNK = settings["chunk"] if settings["mode"] == "stream" else 0
+    transfer.RPC_RATE = 0
+    transfer.RECEIPT_POLL_INTERVAL = min(transfer.RECEIPT_POLL_INTERVAL, settings["block_time"] / 4)
+
+    start = time.perf_counter()
+    wallets = transfer.load_wallets()
+    load_seconds = time.perf_counter() - start
+    client = transfer.get_rpc_client()
+    client.is_connected()
+    before = rss_mb()
+    # Per-wallet lines go to /dev/null, buffering them would be measured too
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        with RssSampler() as sampler:
+            start = time.perf_counter()
+            results = transfer.main(client=client)
+            elapsed = time.perf_counter() - start
+    totals = results if isinstance(results, RoundTotals) else RoundTotals.of(results)
+    peak = sampler.peak
+    if peak is None:
+        # ru_maxrss is KB on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 if sys.platform != "darwin"
+                                                                     else 1024 * 1024)
+    print(json.dumps({
+        "mode": settings["mode"],
+        "wallets": len(wallets),
+        "confirmed": totals.confirmed,
+        "sent": totals.sent,
+        "load_seconds": round(load_seconds, 2),
+        "seconds": round(elapsed, 2),
+        "tx_per_sec": round(totals.confirmed / elapsed, 1) if elapsed else None,
+        "rss_before_mb": round(before, 1) if before is not None else None,
+        "peak_rss_mb": round(peak, 1),
+        "round_growth_mb": round(peak - before, 1) if before is not None else None,
+    }))
+
+def make_wallets(count, path):
+    from eth_account import Account
+    with open(path, "w", encoding="utf-8") as f:
+        for _ in range(count):
+            account = Account.create()
+            f.write(f"{account.address},{account.key.hex()}\n")
+
+def take_wallets(source, count, path):
+    written = 0
+    with open(source, "r", encoding="utf-8") as f, open(path, "w", encoding="utf-8") as out:
+        for line in f:
+            if written == count:
+                break
+            out.write(line)
+            written += 1
+    if written < count:
+        raise ValueError(f"{source} has only {written} wallets")
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_result(result):
+    print(f"{result['wallets']:>7} wallets {result['mode']:>6}: "
+          f"peak {result['peak_rss_mb']:.0f} MB (+{result['round_growth_mb']} MB in the round), "
+          f"{result['confirmed']}/{result['sent']} confirmed in {result['seconds']:.1f}s, "
+          f"{result['tx_per_sec']} tx/s (load {result['load_seconds']:.1f}s)")
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.child:
+        run_child(json.loads(args.child))
+        return
+    from bench_send import start_chain
+
+    args.error_rate = 0.0
+    args.jitter = 0.0
+    process, url = start_chain(args)
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            source = args.wallet_file
+            if source is None:
+                source = os.path.join(work_dir, "all.txt")
+                print(f"Creating {max(args.sizes)} wallets...")
+                make_wallets(max(args.sizes), source)
+            print(f"Mock chain at {url}: latency {args.latency}s, block time {args.block_time}s")
+            print(f"{args.tx_per_wallet} transactions per wallet, {args.workers} workers, "
+                  f"chunks of {args.chunk}")
+            print("─" * 44)
+            for size in args.sizes:
+                wallet_file = os.path.join(work_dir, f"wallets-{size}.txt")
+                take_wallets(source, size, wallet_file)
+                for mode in args.modes:
+                    settings = {
+                        "url": url, "mode": mode, "wallet_file": wallet_file,
+                        "journal_file": os.path.join(work_dir, f"journal-{size}-{mode}.db"),
+                        "tx_per_wallet": args.tx_per_wallet, "workers": args.workers,
+                        "chunk": args.chunk, "block_time": args.block_time,
+                    }
+                    output = subprocess.check_output(
+                        [sys.executable, os.path.abspath(__file__), "--child", json.dumps(settings)],
+                        cwd=ROOT, text=True)
+                    result = json.loads(output.strip().splitlines()[-1])
+                    results.append(result)
+                    print_result(result)
+    finally:
+        process.terminate()
+
+    record = {
+        "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "benchmark": "memory",
+        "settings": {key: value for key, value in vars(args).items() if key != "child"},
+        "results": results,
+    }
+    with open(args.output, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+    print(f"Results appended to {args.output}")
+
+if __name__ == "__main__":
+    main()
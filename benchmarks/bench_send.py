@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+End-to-end send path benchmark against a local mock chain, no testnet
+ETH needed. Drives transfer.main() and main.run_transactions() and
+reports transactions/sec, p50/p99 send-to-confirm latency, RPC calls
+and CPU time per transaction. Every run appends one JSON line to
+--output so results can be compared across changes.
+
+Usage: python benchmarks/bench_send.py [--wallets 50] [--latency 0.02] [--error-rate 0.01] ...
+
+CPU time is the bot process only: the mock chain runs in its own
+process, and signing worker processes (--signing-workers) are not counted.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import requests
+from eth_account import Account
+
+from mock_chain import run_server
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Send path benchmark on a mock chain")
+    parser.add_argument("--wallets", type=int, default=50)
+    parser.add_argument("--tx-per-wallet", dest="tx_per_wallet", type=int, default=2)
+    parser.add_argument("--rounds", type=int, default=3, help="transfer.main() calls")
+    parser.add_argument("--runs", type=int, default=2, help="runs of main.run_transactions()")
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per RPC request")
+    parser.add_argument("--jitter", type=float, default=0.01, help="+- seconds on the latency")
+    parser.add_argument("--error-rate", dest="error_rate", type=float, default=0.0,
+                        help="share of RPC requests answered with HTTP 503")
+    parser.add_argument("--block-time", dest="block_time", type=float, default=1.0)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--signing-workers", dest="signing_workers", type=int, default=0)
+    parser.add_argument("--rpc-rate", dest="rpc_rate", type=float, default=0,
+                        help="client rate limit in requests/sec, 0 for none")
+    parser.add_argument("--output", default=os.path.join(ROOT, "benchmarks", "results.jsonl"))
+    parser.add_argument("--profile", help="profile both phases, files start with this prefix")
+    parser.add_argument("--profile-mode", dest="profile_mode", choices=("sample", "cprofile"),
+                        default="sample")
+    parser.add_argument("--verbose", action="store_true", help="show the bot output")
+    return parser.parse_args(argv)
+
+def start_chain(args):
+    """
+    Starts the mock chain in its own process and returns (process, url)
+    """
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(
+        target=run_server,
+        args=(0, args.latency, args.jitter, args.error_rate, args.block_time, sender),
+        daemon=True,
+    )
+    process.start()
+    port = receiver.recv()
+    return process, f"http://127.0.0.1:{port}"
+
+def chain_stats(url):
+    payload = {"jsonrpc": "2.0", "method": "mock_stats", "params": [], "id": 1}
+    return requests.post(url, json=payload, timeout=10).json()["result"]
+
+def make_wallets(count, path):
+    with open(path, "w", encoding="utf-8") as f:
+        for _ in range(count):
+            account = Account.create()
+            f.write(f"{account.address},{account.key.hex()}\n")
+
+def percentile(samples, percent):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+def send_to_confirm(trace):
+    """
+    Seconds from the first broadcast to the end of the last confirm span
+    """
+    spans = trace["spans"]
+    sends = [span["start"] for span in spans if span["name"] == "broadcast"]
+    confirms = [span["start"] + span["duration"] for span in spans if span["name"] == "confirm"]
+    if not sends or not confirms:
+        return None
+    return confirms[-1] - sends[0]
+
+def measure(name, work, url, trace_path, verbose=False):
+    """
+    Runs work() and returns its throughput, latency, RPC and CPU figures
+    """
+    open(trace_path, "w").close()
+    before = chain_stats(url)
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    with output:
+        work()
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+    after = chain_stats(url)
+
+    with open(trace_path, "r", encoding="utf-8") as f:
+        traces = [json.loads(line) for line in f if line.strip()]
+    confirmed = [trace for trace in traces if trace["status"] == "confirmed"]
+    latencies = [latency for latency in map(send_to_confirm, confirmed) if latency is not None]
+    calls = {method: count - before["calls"].get(method, 0)
+             for method, count in after["calls"].items()
+             if count - before["calls"].get(method, 0)}
+    sent = max(len(traces), 1)
+    return {
+        "phase": name,
+        "transactions": len(traces),
+        "confirmed": len(confirmed),
+        "seconds": round(elapsed, 3),
+        "tx_per_sec": round(len(confirmed) / elapsed, 2) if elapsed else None,
+        "p50_send_to_confirm": round(percentile(latencies, 50), 3) if latencies else None,
+        "p99_send_to_confirm": round(percentile(latencies, 99), 3) if latencies else None,
+        "rpc_calls_per_tx": round(sum(calls.values()) / sent, 2),
+        "http_requests_per_tx": round((after["http_requests"] - before["http_requests"]) / sent, 2),
+        "cpu_ms_per_tx": round(cpu * 1000 / sent, 2),
+        "calls": calls,
+    }
+
+def profile(args, name, work):
+    """
+    Wraps work so that it runs under the profiler with --profile
+    """
+    if not args.profile:
+        return work
+
+    def profiled_work():
+        from profiling import profiled
+        with profiled(f"{args.profile}-{name}", args.profile_mode):
+            work()
+    return profiled_work
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_result(result):
+    p50 = result["p50_send_to_confirm"]
+    p99 = result["p99_send_to_confirm"]
+    print(f"{result['phase']:>16}: {result['confirmed']}/{result['transactions']} confirmed "
+          f"in {result['seconds']:.1f}s, {result['tx_per_sec']} tx/s, "
+          f"p50 {p50}s, p99 {p99}s, {result['rpc_calls_per_tx']} RPC calls/tx "
+          f"({result['http_requests_per_tx']} HTTP), {result['cpu_ms_per_tx']} ms CPU/tx")
+
+def main(argv=None):
+    args = parse_args(argv)
+    process, url = start_chain(args)
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            import transfer
+            import main as bot
+            transfer.RPC_URL = url
+            transfer.WALLET_FILE = os.path.join(work_dir, "wallet.txt")
+            transfer.JOURNAL_FILE = os.path.join(work_dir, "journal.db")
+            transfer.TRACE_FILE = os.path.join(work_dir, "traces.jsonl")
+            transfer.TX_PER_WALLET = args.tx_per_wallet
+            transfer.MAX_WORKERS = args.workers
+            transfer.SIGNING_WORKERS = args.signing_workers
+            transfer.RPC_RATE = args.rpc_rate
+            transfer.RECEIPT_POLL_INTERVAL = min(transfer.RECEIPT_POLL_INTERVAL, args.block_time / 4)
+            make_wallets(args.wallets, transfer.WALLET_FILE)
+
+            print(f"Mock chain at {url}: latency {args.latency}s +- {args.jitter}s, "
+                  f"errors {args.error_rate:.0%}, block time {args.block_time}s")
+            print(f"{args.wallets} wallets, {args.tx_per_wallet} transactions per wallet")
+            print("─" * 44)
+            results = []
+            if args.rounds:
+                result = measure(
+                    "transfer.main",
+                    profile(args, "main", lambda: [transfer.main() for _ in range(args.rounds)]),
+                    url, transfer.TRACE_FILE, args.verbose)
+                results.append(result)
+                print_result(result)
+            if args.runs:
+                result = measure(
+                    "run_transactions",
+                    profile(args, "run", lambda: bot.run_transactions(args.runs, 0)),
+                    url, transfer.TRACE_FILE, args.verbose)
+                results.append(result)
+                print_result(result)
+    finally:
+        process.terminate()
+
+    record = {
+        "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "settings": vars(args),
+        "results": results,
+    }
+    with open(args.output, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+    print(f"Results appended to {args.output}")
+    if args.profile:
+        print(f"Profiles: {args.profile}-main.txt, {args.profile}-run.txt and their stacks")
+
+if __name__ == "__main__":
+    main()
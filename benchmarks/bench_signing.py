@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Signatures per second for in-thread signing and for the signing pool
+with 1, 2, 4 and N (CPU count) worker processes, once with sign_batch()
+and once with sign() called from many threads the way process_wallet()
+calls it.
+
+Usage: python benchmarks/bench_signing.py [transactions] [wallets] [threads]
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from eth_account import Account
+
+from calldata import TRANSFER_TEMPLATE
+from signing import SigningPool, sign_in_process
+
+def make_items(count, wallets):
+    items = []
+    for i in range(count):
+        wallet = wallets[i % len(wallets)]
+        items.append((wallet["address"], {
+            "to": "0x5FbE74A283f7954f10AA04C2eDf55578811aeb03",
+            "value": 10913304046004750,
+            "gas": 500000,
+            "gasPrice": 20000000000,
+            "nonce": i // len(wallets),
+            "data": TRANSFER_TEMPLATE.build(wallet["address"]),
+            "chainId": 17000,
+        }))
+    return items
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    wallet_count = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    threads = int(sys.argv[3]) if len(sys.argv) > 3 else 32
+    accounts = [Account.create() for _ in range(wallet_count)]
+    wallets = [{"address": a.address, "private_key": a.key.hex()} for a in accounts]
+    by_address = {w["address"]: w for w in wallets}
+    items = make_items(count, wallets)
+
+    print(f"Signing {count} transactions from {wallet_count} wallets, sign() from {threads} threads")
+    print("─" * 44)
+    start = time.perf_counter()
+    for address, transaction in items:
+        sign_in_process(by_address[address], transaction)
+    elapsed = time.perf_counter() - start
+    print(f"{'in-thread':>10}: {count / elapsed:10.1f} signatures/sec")
+
+    cpus = os.cpu_count() or 1
+    for workers in sorted({1, 2, 4, cpus}):
+        pool = SigningPool(wallets, workers)
+        # Start the workers and load keys before timing
+        pool.sign_batch(items[:workers])
+        start = time.perf_counter()
+        pool.sign_batch(items)
+        batch_elapsed = time.perf_counter() - start
+
+        batches = pool.batches
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(lambda item: pool.sign(*item), items))
+        sign_elapsed = time.perf_counter() - start
+        batches = pool.batches - batches
+        pool.close()
+        label = f"{workers} worker" + ("s" if workers > 1 else "")
+        print(f"{label:>10}: {count / batch_elapsed:10.1f} signatures/sec (sign_batch), "
+              f"{count / sign_elapsed:10.1f} signatures/sec (sign, "
+              f"{count / batches:.1f} per round trip)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Local JSON-RPC stand-in for the benchmarks. Accepts signed transactions,
+mines them every block_time seconds and answers the calls transfer.py
+makes. Every HTTP request can be delayed (latency +- jitter) and a share
+of them answered with HTTP 503 (error_rate). serve_many() puts one chain
+behind several ports, the endpoints of an RPC pool.
+
+Usage: python benchmarks/mock_chain.py [port] [latency] [jitter] [error_rate] [block_time] [count]
+"""
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import rlp
+from eth_account import Account
+from eth_utils import keccak
+
+CHAIN_ID = 17000
+GAS_PRICE = 10 ** 9
+BASE_FEE = 10 ** 9
+BALANCE = 10 ** 20
+GAS_ESTIMATE = 180000
+
+def _decode(raw):
+    """
+    Returns (nonce, fee) of a signed legacy or type-2 transaction
+    """
+    if raw[0] < 0x7f:
+        # Type-2: chainId, nonce, maxPriorityFeePerGas, maxFeePerGas, ...
+        fields = rlp.decode(raw[1:])
+        return int.from_bytes(fields[1], "big"), int.from_bytes(fields[3], "big")
+    fields = rlp.decode(raw)
+    return int.from_bytes(fields[0], "big"), int.from_bytes(fields[1], "big")
+
+class MockChain:
+    """
+    Accounts, mempool, blocks and receipts of the stand-in chain
+    """
+
+    def __init__(self, block_time=1.0):
+        self.block_time = block_time
+        self.block = 1
+        self.pending_nonces = {}
+        self.mined_nonces = {}
+        self.mempool = []
+        self.blocks = {}
+        self.receipts = {}
+        self.null_blocks = set()  # Blocks answered with null once, like a lagging node
+        self.calls = {}
+        self.http_requests = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        threading.Thread(target=self._mine, name="miner", daemon=True).start()
+
+    def close(self):
+        self._stop.set()
+
+    def _mine(self):
+        while not self._stop.wait(self.block_time):
+            self.mine()
+
+    def mine(self):
+        """
+        Mines the mempool into a new block
+        """
+        with self._lock:
+            self.block += 1
+            self.blocks[self.block] = [tx_hash for tx_hash, _, _, _ in self.mempool]
+            for index, (tx_hash, sender, nonce, _) in enumerate(self.mempool):
+                self.mined_nonces[sender] = max(self.mined_nonces.get(sender, 0), nonce + 1)
+                self.receipts[tx_hash] = {
+                    "transactionHash": tx_hash, "blockNumber": hex(self.block),
+                    "blockHash": "0x" + self.block.to_bytes(32, "big").hex(),
+                    "transactionIndex": hex(index), "from": sender, "to": None,
+                    "status": "0x1", "gasUsed": hex(GAS_ESTIMATE),
+                    "cumulativeGasUsed": hex(GAS_ESTIMATE * (index + 1)), "logs": [],
+                    "logsBloom": "0x" + "00" * 256, "contractAddress": None,
+                    "effectiveGasPrice": hex(GAS_PRICE), "type": "0x2",
+                }
+            self.mempool = []
+
+    def evict(self, address, nonce):
+        """
+        Forgets an address's pending transactions from nonce on, like a
+        node evicting them from a full mempool
+        """
+        sender = address.lower()
+        with self._lock:
+            self.mempool = [tx for tx in self.mempool if tx[1] != sender or tx[2] < nonce]
+            if self.pending_nonces.get(sender, 0) > nonce:
+                self.pending_nonces[sender] = nonce
+
+    def _send(self, raw_hex):
+        raw = bytes.fromhex(raw_hex[2:])
+        sender = Account.recover_transaction(raw).lower()
+        nonce, fee = _decode(raw)
+        tx_hash = "0x" + keccak(raw).hex()
+        if tx_hash in self.receipts or any(tx[0] == tx_hash for tx in self.mempool):
+            raise ValueError("already known")
+        expected = self.pending_nonces.get(sender, 0)
+        old = [tx for tx in self.mempool if tx[1] == sender and tx[2] == nonce]
+        if old:
+            if fee < old[0][3] * 1.1:
+                raise ValueError("replacement transaction underpriced")
+            self.mempool.remove(old[0])
+        elif nonce < expected:
+            raise ValueError("nonce too low")
+        self.pending_nonces[sender] = max(expected, nonce + 1)
+        self.mempool.append((tx_hash, sender, nonce, fee))
+        return tx_hash
+
+    def handle(self, request):
+        method, params = request.get("method"), request.get("params") or []
+        if method == "mock_stats":
+            with self._lock:
+                result = {"calls": dict(self.calls), "http_requests": self.http_requests,
+                          "block": self.block}
+            return {"jsonrpc": "2.0", "id": request.get("id"), "result": result}
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+            try:
+                result = self._answer(method, params)
+            except ValueError as e:
+                return {"jsonrpc": "2.0", "id": request.get("id"),
+                        "error": {"code": -32000, "message": str(e)}}
+        return {"jsonrpc": "2.0", "id": request.get("id"), "result": result}
+
+    def _answer(self, method, params):
+        if method == "web3_clientVersion":
+            return "mock-chain/1.0"
+        if method == "eth_chainId":
+            return hex(CHAIN_ID)
+        if method == "eth_blockNumber":
+            return hex(self.block)
+        if method == "eth_gasPrice":
+            return hex(GAS_PRICE)
+        if method == "eth_getBalance":
+            return hex(BALANCE)
+        if method == "eth_estimateGas":
+            return hex(GAS_ESTIMATE)
+        if method == "eth_feeHistory":
+            # Like a node, never more blocks than the chain has
+            count = min(int(params[0], 16), self.block + 1)
+            return {
+                "oldestBlock": hex(self.block - count + 1),
+                "baseFeePerGas": [hex(BASE_FEE)] * (count + 1),
+                "gasUsedRatio": [0.5] * count,
+                "reward": [[hex(10 ** 8)] for _ in range(count)],
+            }
+        if method == "eth_getTransactionCount":
+            nonces = self.mined_nonces if params[1:] == ["latest"] else self.pending_nonces
+            return hex(nonces.get(params[0].lower(), 0))
+        if method == "eth_sendRawTransaction":
+            return self._send(params[0])
+        if method == "eth_getTransactionReceipt":
+            return self.receipts.get(params[0].lower())
+        if method == "eth_getBlockReceipts":
+            if int(params[0], 16) in self.null_blocks:
+                self.null_blocks.discard(int(params[0], 16))
+                return None
+            return [self.receipts[tx_hash] for tx_hash in self.blocks.get(int(params[0], 16), [])]
+        if method == "eth_call":
+            return "0x"
+        raise ValueError(f"the method {method} does not exist/is not available")
+
+def serve(port=0, latency=0.0, jitter=0.0, error_rate=0.0, block_time=1.0, chain=None):
+    """
+    Starts the mock chain on 127.0.0.1:port in background threads, or
+    another port for an existing chain. Returns (chain, server),
+    server.server_port has the real port. latency, jitter and error_rate
+    are server attributes and can be changed while it runs.
+    """
+    if chain is None:
+        chain = MockChain(block_time)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            server = self.server
+            with chain._lock:
+                chain.http_requests += 1
+                server.http_requests += 1
+            delay = server.latency + random.uniform(-server.jitter, server.jitter)
+            if delay > 0:
+                time.sleep(delay)
+            if server.error_rate and random.random() < server.error_rate:
+                self._reply(503, b"overloaded")
+                return
+            if isinstance(body, list):
+                answer = [chain.handle(request) for request in body]
+            else:
+                answer = chain.handle(body)
+            self._reply(200, json.dumps(answer).encode())
+
+        def _reply(self, status, data):
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.jitter = jitter
+    server.error_rate = error_rate
+    server.http_requests = 0
+    threading.Thread(target=server.serve_forever, name="mock-chain", daemon=True).start()
+    return chain, server
+
+def serve_many(count, latency=0.0, jitter=0.0, error_rate=0.0, block_time=1.0):
+    """
+    Serves one chain on count free ports. Returns (chain, servers).
+    """
+    chain, server = serve(0, latency, jitter, error_rate, block_time)
+    servers = [server]
+    for _ in range(count - 1):
+        servers.append(serve(0, latency, jitter, error_rate, chain=chain)[1])
+    return chain, servers
+
+def run_server(port, latency, jitter, error_rate, block_time, ready=None, count=1):
+    """
+    Serves until the process is stopped, sends the port to ready (a pipe).
+    With count > 1 the chain is also served on the next ports.
+    """
+    chain, server = serve(port, latency, jitter, error_rate, block_time)
+    servers = [server]
+    for index in range(1, count):
+        servers.append(serve(port + index if port else 0, latency, jitter, error_rate,
+                             chain=chain)[1])
+    if ready is not None:
+        ready.send(server.server_port)
+    else:
+        for server in servers:
+            print(f"Mock chain on http://127.0.0.1:{server.server_port}")
+    while True:
+        time.sleep(3600)
+
+if __name__ == "__main__":
+    import sys
+    args = sys.argv[1:]
+    try:
+        run_server(
+            int(args[0]) if len(args) > 0 else 8545,
+            float(args[1]) if len(args) > 1 else 0.0,
+            float(args[2]) if len(args) > 2 else 0.0,
+            float(args[3]) if len(args) > 3 else 0.0,
+            float(args[4]) if len(args) > 4 else 1.0,
+            count=int(args[5]) if len(args) > 5 else 1,
+        )
+    except KeyboardInterrupt:
+        pass
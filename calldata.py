@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import time
+from functools import lru_cache
+
+from eth_utils import is_checksum_address
+
+# Function selector of the transfer call
+TRANSFER_SELECTOR = "ff0d7c2f"
+
+# Deadline distance from now, in seconds
+DEADLINE_SECONDS = 72 * 3600
+
+# Route defaults (Holesky -> Sepolia)
+DEFAULT_CHANNEL = 2  # Destination channel id
+DEFAULT_AMOUNT = 10 ** 15  # Amount sent and received, in Wei
+DEFAULT_TOKEN = "0xf6E7E2725b40EC8226036906cAb0f5dC3722b8E7"  # Token on the destination chain
+
+# Slots filled in per transaction
+DEADLINE = object()
+ADDRESS = object()
+
+# Slots filled in once per route
+CHANNEL = object()
+AMOUNT = object()
+TOKEN = object()
+
+# 32-byte words after the selector. The signature word is empty (64 zeros).
+TRANSFER_WORDS = (
+    CHANNEL,
+    "0000000000000000000000000000000000000000000000000000000000000000",
+    DEADLINE,
+    "0000000000000000000000000000000000000000000000000000000000000000",
+    "00000000000000000000000000000000000000000000000000000000000000a0",
+    "0000000000000000000000000000000000000000000000000000000000000000",
+    "0000000000000000000000000000000000000000000000000000000000000002",
+    "0000000000000000000000000000000000000000000000000000000000000060",
+    "0000000000000000000000000000000000000000000000000000000000000700",
+    "0000000000000000000000000000000000000000000000000000000000000020",
+    "0000000000000000000000000000000000000000000000000000000000000002",
+    "0000000000000000000000000000000000000000000000000000000000000040",
+    "0000000000000000000000000000000000000000000000000000000000000380",
+    "0000000000000000000000000000000000000000000000000000000000000001",
+    "0000000000000000000000000000000000000000000000000000000000000003",
+    "0000000000000000000000000000000000000000000000000000000000000060",
+    "00000000000000000000000000000000000000000000000000000000000002c0",
+    "0000000000000000000000000000000000000000000000000000000000000140",
+    "0000000000000000000000000000000000000000000000000000000000000180",
+    "00000000000000000000000000000000000000000000000000000000000001c0",
+    AMOUNT,
+    "0000000000000000000000000000000000000000000000000000000000000200",
+    "0000000000000000000000000000000000000000000000000000000000000240",
+    "0000000000000000000000000000000000000000000000000000000000000012",
+    "0000000000000000000000000000000000000000000000000000000000000000",
+    "0000000000000000000000000000000000000000000000000000000000000280",
+    AMOUNT,
+    "0000000000000000000000000000000000000000000000000000000000000014",
+    ADDRESS,
+    "0000000000000000000000000000000000000000000000000000000000000014",
+    ADDRESS,
+    "0000000000000000000000000000000000000000000000000000000000000014",
+    "eeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeee000000000000000000000000",
+    "0000000000000000000000000000000000000000000000000000000000000003",
+    "4554480000000000000000000000000000000000000000000000000000000000",
+    "0000000000000000000000000000000000000000000000000000000000000005",
+    "4574686572000000000000000000000000000000000000000000000000000000",
+    "0000000000000000000000000000000000000000000000000000000000000014",
+    TOKEN,
+    "0000000000000000000000000000000000000000000000000000000000000001",
+    "0000000000000000000000000000000000000000000000000000000000000003",
+    "0000000000000000000000000000000000000000000000000000000000000060",
+    "00000000000000000000000000000000000000000000000000000000000002c0",
+    "0000000000000000000000000000000000000000000000000000000000000140",
+    "0000000000000000000000000000000000000000000000000000000000000180",
+    "00000000000000000000000000000000000000000000000000000000000001c0",
+    "000000000000000000000000000000000000000000000000000002e406abe040",
+    "0000000000000000000000000000000000000000000000000000000000000200",
+    "0000000000000000000000000000000000000000000000000000000000000240",
+    "0000000000000000000000000000000000000000000000000000000000000012",
+    "0000000000000000000000000000000000000000000000000000000000000000",
+    "0000000000000000000000000000000000000000000000000000000000000280",
+    "0000000000000000000000000000000000000000000000000000000000000000",
+    "0000000000000000000000000000000000000000000000000000000000000014",
+    ADDRESS,
+    "0000000000000000000000000000000000000000000000000000000000000014",
+    ADDRESS,
+    "0000000000000000000000000000000000000000000000000000000000000014",
+    "eeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeee000000000000000000000000",
+    "0000000000000000000000000000000000000000000000000000000000000003",
+    "4554480000000000000000000000000000000000000000000000000000000000",
+    "0000000000000000000000000000000000000000000000000000000000000005",
+    "4574686572000000000000000000000000000000000000000000000000000000",
+    "0000000000000000000000000000000000000000000000000000000000000014",
+    TOKEN,
+)
+
+@lru_cache(maxsize=65536)
+def address_bytes(address):
+    """
+    Validates an address (0x + 20 bytes, EIP-55 checksum if mixed case)
+    and returns its 20 raw bytes
+    """
+    if not isinstance(address, str) or len(address) != 42 or not address.startswith("0x"):
+        raise ValueError(f"Invalid wallet address: {address!r}")
+    body = address[2:]
+    mixed_case = body != body.lower() and body != body.upper()
+    if mixed_case and not is_checksum_address(address):
+        raise ValueError(f"Wallet address checksum mismatch: {address}")
+    try:
+        raw = bytes.fromhex(body)
+    except ValueError:
+        raise ValueError(f"Invalid wallet address: {address!r}")
+    return raw
+
+class CalldataTemplate:
+    """
+    Calldata built once into a byte buffer with the route's channel, amount
+    and token. Only the deadline and the address slots are patched for
+    each transaction.
+    """
+
+    def __init__(self, selector=TRANSFER_SELECTOR, words=TRANSFER_WORDS, channel=DEFAULT_CHANNEL,
+                 amount=DEFAULT_AMOUNT, token=DEFAULT_TOKEN):
+        buffer = bytearray.fromhex(selector)
+        self.deadline_offsets = []
+        self.address_offsets = []
+        # Token addresses are bytes values here, so they are left-aligned
+        token_word = address_bytes(token) + bytes(12)
+        for word in words:
+            offset = len(buffer)
+            if word is CHANNEL:
+                buffer += channel.to_bytes(32, "big")
+            elif word is AMOUNT:
+                buffer += amount.to_bytes(32, "big")
+            elif word is TOKEN:
+                buffer += token_word
+            elif word is DEADLINE:
+                self.deadline_offsets.append(offset)
+                buffer += bytes(32)
+            elif word is ADDRESS:
+                self.address_offsets.append(offset)
+                buffer += bytes(32)
+            else:
+                buffer += bytes.fromhex(word)
+        self.template = bytes(buffer)
+
+    def build(self, address, deadline=None):
+        """
+        Returns the calldata bytes for a wallet address and deadline
+        """
+        raw = address_bytes(address)
+        if deadline is None:
+            deadline = int(time.time()) + DEADLINE_SECONDS
+        buffer = bytearray(self.template)
+        deadline_word = deadline.to_bytes(32, "big")
+        for offset in self.deadline_offsets:
+            buffer[offset:offset + 32] = deadline_word
+        # Addresses are right-aligned in their 32-byte word
+        for offset in self.address_offsets:
+            buffer[offset + 12:offset + 32] = raw
+        return bytes(buffer)
+
+TRANSFER_TEMPLATE = CalldataTemplate()
+
+@lru_cache(maxsize=64)
+def get_template(channel=DEFAULT_CHANNEL, amount=DEFAULT_AMOUNT, token=DEFAULT_TOKEN):
+    """
+    Returns the shared template for a route's channel, amount and token
+    """
+    if (channel, amount, token) == (DEFAULT_CHANNEL, DEFAULT_AMOUNT, DEFAULT_TOKEN):
+        return TRANSFER_TEMPLATE
+    return CalldataTemplate(channel=channel, amount=amount, token=token)
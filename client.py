@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import itertools
+import json
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError
+from urllib3.util.retry import Retry
+
+from metrics import RPC_REQUESTS, RPC_SECONDS, count_error
+from ratelimit import (DEFAULT_BURST, DEFAULT_RATE, PRIORITY_DEFAULT, RETRY_STATUSES,
+                       RateLimiter, backoff_delay, method_priority, parse_retry_after)
+
+# Connection pool settings
+DEFAULT_POOL_SIZE = 32  # Keep-alive connections kept per host
+DEFAULT_TIMEOUT = 30  # Seconds per HTTP request
+DEFAULT_RETRIES = 3  # Retries on connection errors, timeouts, 429 and 5xx answers
+DEFAULT_BATCH_SIZE = 100  # Requests per JSON-RPC batch
+
+# Methods a node may have carried out even when its answer never came back
+UNSAFE_RETRY_METHODS = ("eth_sendRawTransaction",)
+
+class RpcError(Exception):
+    """
+    Error object returned by the JSON-RPC node
+    """
+
+    def __init__(self, error):
+        self.code = error.get("code") if isinstance(error, dict) else None
+        message = error.get("message") if isinstance(error, dict) else error
+        super().__init__(message)
+
+def not_sent(error):
+    """
+    Checks if a request error happened before the request reached the node
+    """
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, ConnectTimeoutError)
+
+def endpoint_name(url):
+    """
+    Host and port of an RPC URL. The path and query of provider URLs often
+    hold the API key, so this is what gets printed or exported.
+    """
+    parsed = urlparse(url)
+    if not parsed.hostname:
+        return url
+    return f"{parsed.hostname}:{parsed.port}" if parsed.port else parsed.hostname
+
+def make_session(pool_size=DEFAULT_POOL_SIZE, retries=DEFAULT_RETRIES):
+    """
+    Creates a keep-alive HTTP session with a connection pool.
+    urllib3 only retries failed connects, timeouts and throttling answers
+    are retried by RpcClient with the rate limiter.
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=0,
+        status=0,
+        backoff_factor=0.5,
+        allowed_methods=None,  # JSON-RPC uses POST for everything
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"Content-Type": "application/json"})
+    return session
+
+class BaseClient:
+    """
+    JSON-RPC calls, batches and a Web3 instance on top of post().
+    Subclasses decide where a payload is sent.
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self.endpoint = endpoint_name(url)
+        self._ids = itertools.count(1)
+        self._w3 = None
+        self._connected = False
+        self.first_request_time = None
+        self._lock = threading.Lock()
+
+    def post(self, payload, priority=PRIORITY_DEFAULT, method=None):
+        """
+        Posts an encoded JSON-RPC payload and returns the decoded answer
+        """
+        raise NotImplementedError
+
+    def make_request(self, method, params):
+        """
+        Sends one JSON-RPC request and returns the raw response dict
+        """
+        payload = json.dumps({
+            "jsonrpc": "2.0",
+            "method": method,
+            "params": params or [],
+            "id": next(self._ids),
+        })
+        return self.post(payload, method_priority(method), method)
+
+    def call(self, method, params=None):
+        """
+        Sends one JSON-RPC request and returns its result
+        """
+        response = self.make_request(method, params)
+        if "error" in response:
+            raise RpcError(response["error"])
+        return response.get("result")
+
+    def batch(self, calls, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Sends (method, params) pairs as JSON-RPC batches of batch_size.
+        Returns results in call order, with an RpcError for failed calls.
+        """
+        results = []
+        for start in range(0, len(calls), batch_size):
+            chunk = calls[start:start + batch_size]
+            requests_ = [{
+                "jsonrpc": "2.0",
+                "method": method,
+                "params": params or [],
+                "id": next(self._ids),
+            } for method, params in chunk]
+            priority = min(method_priority(method) for method, _ in chunk)
+            responses = self.post(json.dumps(requests_), priority)
+            if not isinstance(responses, list):
+                # Nodes without batch support answer with a single error
+                raise RpcError(responses.get("error", responses))
+            by_id = {response.get("id"): response for response in responses}
+            for request in requests_:
+                response = by_id.get(request["id"])
+                if response is None:
+                    results.append(RpcError(f"No response for {request['method']}"))
+                elif "error" in response:
+                    results.append(RpcError(response["error"]))
+                else:
+                    results.append(response.get("result"))
+        return results
+
+    @property
+    def w3(self):
+        """
+        Web3 instance sending its requests through this client.
+        web3 is only imported on first use.
+        """
+        with self._lock:
+            if self._w3 is None:
+                from web3 import Web3
+                from provider import ClientProvider
+                self._w3 = Web3(ClientProvider(self))
+            return self._w3
+
+    def is_connected(self):
+        """
+        Checks the connection once, later calls reuse the answer
+        """
+        if not self._connected:
+            try:
+                self.call("web3_clientVersion")
+                self._connected = True
+            except (requests.RequestException, RpcError, ValueError):
+                self._connected = False
+        return self._connected
+
+    def stats(self):
+        """
+        Per-endpoint statistics, empty for a single endpoint
+        """
+        return []
+
+    def probe(self):
+        """
+        Re-checks failed endpoints, nothing to do for a single endpoint
+        """
+
+    def close(self):
+        pass
+
+class RpcClient(BaseClient):
+    """
+    Long-lived JSON-RPC client for one endpoint. Owns one pooled HTTP
+    session that is shared by its Web3 instance and by raw calls.
+    """
+
+    def __init__(self, url, pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT,
+                 retries=DEFAULT_RETRIES, rate=DEFAULT_RATE, burst=DEFAULT_BURST):
+        super().__init__(url)
+        self.timeout = timeout
+        self.retries = retries
+        self.session = make_session(pool_size, retries)
+        self.limiter = RateLimiter(rate, burst)
+
+    def post(self, payload, priority=PRIORITY_DEFAULT, method=None):
+        """
+        Posts an encoded JSON-RPC payload and returns the decoded answer.
+        Every attempt takes a rate limiter token. 429, 5xx and timeouts are
+        retried after Retry-After or a jittered exponential backoff. Sends
+        are only retried on 429 and when the connection could not be made,
+        a node that timed out or failed with 5xx may still have taken them.
+        """
+        start = time.perf_counter()
+        if self.first_request_time is None:
+            self.first_request_time = start
+        method = method or "batch"
+        RPC_REQUESTS.inc(endpoint=self.endpoint, method=method)
+        try:
+            return self._post(payload, priority, method)
+        except Exception as e:
+            count_error("rpc", e)
+            raise
+        finally:
+            RPC_SECONDS.observe(time.perf_counter() - start, method=method)
+
+    def _post(self, payload, priority, method=None):
+        unsafe = method in UNSAFE_RETRY_METHODS
+        attempt = 0
+        while True:
+            self.limiter.acquire(priority)
+            try:
+                response = self.session.post(self.url, data=payload, timeout=self.timeout)
+            except (requests.Timeout, requests.ConnectionError) as e:
+                if attempt >= self.retries or (unsafe and not not_sent(e)):
+                    raise
+                self.limiter.pause(backoff_delay(attempt))
+                attempt += 1
+                continue
+            if (response.status_code in RETRY_STATUSES and attempt < self.retries
+                    and not (unsafe and response.status_code != 429)):
+                delay = parse_retry_after(response.headers.get("Retry-After"))
+                # Throttling applies to the whole endpoint, so everyone waits
+                self.limiter.pause(delay if delay is not None else backoff_delay(attempt))
+                attempt += 1
+                continue
+            response.raise_for_status()
+            return response.json()
+
+    def close(self):
+        self.session.close()
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_client(url, **kwargs):
+    """
+    Returns the shared client for an RPC URL, creating it on first use
+    """
+    with _clients_lock:
+        client = _clients.get(url)
+        if client is None:
+            client = RpcClient(url, **kwargs)
+            _clients[url] = client
+        return client
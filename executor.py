@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+# Wallets processed at the same time
+DEFAULT_MAX_WORKERS = 8
+
+@dataclass
+class WalletResult:
+    """
+    Outcome of all transactions sent from one wallet in a run
+    """
+    address: str
+    sent: list = field(default_factory=list)
+    confirmed: list = field(default_factory=list)
+    failed: list = field(default_factory=list)
+    dropped: list = field(default_factory=list)
+    errors: list = field(default_factory=list)
+    elapsed: float = 0.0
+    skipped: str = None  # Reason the wallet was left out of the run
+
+    @property
+    def ok(self):
+        return bool(self.sent) and len(self.confirmed) == len(self.sent) and not self.errors
+
+    def summary(self):
+        if self.skipped:
+            return f"{self.address}: skipped - {self.skipped}"
+        text = (f"{self.address}: {len(self.confirmed)}/{len(self.sent)} confirmed, "
+                f"{len(self.failed)} failed, {len(self.dropped)} dropped ({self.elapsed:.1f}s)")
+        if self.errors:
+            text += f" - {self.errors[-1]}"
+        return text
+
+    def merge(self, other):
+        self.sent += other.sent
+        self.confirmed += other.confirmed
+        self.failed += other.failed
+        self.dropped += other.dropped
+        self.errors += other.errors
+        self.elapsed += other.elapsed
+
+@dataclass
+class RoundTotals:
+    """
+    Counts over the WalletResults of a round, for rounds whose results
+    are not kept (streaming mode)
+    """
+    wallets: int = 0
+    skipped: int = 0
+    ok: int = 0
+    sent: int = 0
+    confirmed: int = 0
+    failed: int = 0
+    dropped: int = 0
+    errors: int = 0
+
+    @classmethod
+    def of(cls, results):
+        totals = cls()
+        for result in results:
+            totals.add(result)
+        return totals
+
+    def add(self, result):
+        self.wallets += 1
+        if result.skipped:
+            self.skipped += 1
+            return
+        self.ok += result.ok
+        self.sent += len(result.sent)
+        self.confirmed += len(result.confirmed)
+        self.failed += len(result.failed)
+        self.dropped += len(result.dropped)
+        self.errors += len(result.errors)
+
+    def summary(self):
+        return (f"{self.wallets} wallets: {self.ok} ok, {self.skipped} skipped, "
+                f"{self.confirmed}/{self.sent} confirmed, {self.failed} failed, "
+                f"{self.dropped} dropped, {self.errors} errors")
+
+def group_by_address(wallets):
+    """
+    Groups wallet entries by address, keeping file order
+    """
+    groups = {}
+    for wallet in wallets:
+        groups.setdefault(wallet["address"].lower(), []).append(wallet)
+    return list(groups.values())
+
+def _run_group(worker, group):
+    # Entries of the same address run one after another in this task,
+    # so their nonces and transactions stay in order
+    result = None
+    for wallet in group:
+        start = time.monotonic()
+        try:
+            wallet_result = worker(wallet)
+        except Exception as e:
+            wallet_result = WalletResult(address=wallet["address"], errors=[str(e)])
+        wallet_result.elapsed = time.monotonic() - start
+        if result is None:
+            result = wallet_result
+        else:
+            result.merge(wallet_result)
+    return result
+
+def run_wallets(wallets, worker, max_workers=DEFAULT_MAX_WORKERS):
+    """
+    Runs worker(wallet) for every wallet on a bounded thread pool.
+    Returns one WalletResult per address, in wallet file order.
+    """
+    groups = group_by_address(wallets)
+    if not groups:
+        return []
+    max_workers = max(1, min(max_workers, len(groups)))
+    if max_workers == 1:
+        return [_run_group(worker, group) for group in groups]
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="wallet") as pool:
+        futures = [pool.submit(_run_group, worker, group) for group in groups]
+        return [future.result() for future in futures]
+
+# Tells a stream worker thread to stop
+_DONE = object()
+
+def stream_wallets(chunks, max_workers=DEFAULT_MAX_WORKERS, queue_size=None, on_result=None):
+    """
+    Runs wallets read lazily from chunks, an iterable of
+    (wallets, worker, skipped results) tuples, on max_workers threads.
+    A reader thread pulls the next chunk into a bounded queue and blocks
+    while it is full, so only about queue_size wallets wait at a time.
+    Results go to on_result(result) as they finish and are then only
+    counted. Returns the RoundTotals. Entries of one address are run in
+    order only within a chunk, so an address must not be in two chunks
+    (WalletStore.chunks() keeps them together).
+    """
+    max_workers = max(1, max_workers)
+    work = queue.Queue(maxsize=queue_size or max_workers * 2)
+    totals = RoundTotals()
+    lock = threading.Lock()
+    failure = []
+
+    def finish(result):
+        with lock:
+            totals.add(result)
+            if on_result is not None:
+                on_result(result)
+
+    def read():
+        try:
+            for wallets, worker, skipped in chunks:
+                for result in skipped:
+                    finish(result)
+                for group in group_by_address(wallets):
+                    work.put((worker, group))
+        except Exception as e:
+            failure.append(e)
+        finally:
+            for _ in range(max_workers):
+                work.put(_DONE)
+
+    def run():
+        while True:
+            item = work.get()
+            if item is _DONE:
+                return
+            finish(_run_group(*item))
+
+    threads = [threading.Thread(target=read, name="wallet-reader", daemon=True)]
+    threads += [threading.Thread(target=run, name=f"wallet_{i}", daemon=True)
+                for i in range(max_workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if failure:
+        raise failure[0]
+    return totals
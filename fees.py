@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import math
+import threading
+from dataclasses import dataclass
+
+# Fee history settings
+DEFAULT_HISTORY_BLOCKS = 10  # Blocks read with eth_feeHistory
+DEFAULT_REWARD_PERCENTILE = 50  # Priority fee percentile paid in those blocks
+DEFAULT_BASE_FEE_MULTIPLIER = 2  # Headroom for base fee rises before inclusion
+DEFAULT_TTL_BLOCKS = 1  # Reuse a quote until the head moves this many blocks
+MIN_PRIORITY_FEE = 1000000  # 0.001 Gwei
+DEFAULT_FEE_BUMP = 1.2  # Nodes want at least +10% on both fees for a replacement
+
+@dataclass
+class FeeQuote:
+    """
+    EIP-1559 fees for the next block
+    """
+    max_fee_per_gas: int
+    max_priority_fee_per_gas: int
+    base_fee_per_gas: int
+    block_number: int = None
+
+    def transaction_fields(self):
+        return {
+            "type": 2,
+            "maxFeePerGas": self.max_fee_per_gas,
+            "maxPriorityFeePerGas": self.max_priority_fee_per_gas,
+        }
+
+def _to_int(value):
+    if isinstance(value, str):
+        return int(value, 16)
+    return value
+
+def fees_from_history(history, reward_index=0, base_fee_multiplier=DEFAULT_BASE_FEE_MULTIPLIER):
+    """
+    Computes a FeeQuote from an eth_feeHistory result
+    """
+    base_fees = [_to_int(fee) for fee in history["baseFeePerGas"]]
+    # The last entry is the base fee of the block after the newest one
+    next_base_fee = base_fees[-1]
+    rewards = sorted(
+        _to_int(block[reward_index])
+        for block in history.get("reward") or []
+        if block and _to_int(block[reward_index]) > 0
+    )
+    priority = rewards[len(rewards) // 2] if rewards else MIN_PRIORITY_FEE
+    priority = max(priority, MIN_PRIORITY_FEE)
+    newest = _to_int(history["oldestBlock"]) + len(base_fees) - 2
+    return FeeQuote(
+        max_fee_per_gas=next_base_fee * base_fee_multiplier + priority,
+        max_priority_fee_per_gas=priority,
+        base_fee_per_gas=next_base_fee,
+        block_number=newest,
+    )
+
+def bump_fees(transaction, factor=DEFAULT_FEE_BUMP, fees=None):
+    """
+    Returns a copy of a transaction with its fees raised by factor, or
+    up to the current fees (a FeeQuote) if those are higher
+    """
+    bumped = dict(transaction)
+    current = fees.transaction_fields() if fees is not None else {}
+    for key in ("maxFeePerGas", "maxPriorityFeePerGas", "gasPrice"):
+        if key in bumped:
+            bumped[key] = max(math.ceil(bumped[key] * factor), current.get(key, 0))
+    if bumped.get("maxPriorityFeePerGas", 0) > bumped.get("maxFeePerGas", math.inf):
+        bumped["maxFeePerGas"] = bumped["maxPriorityFeePerGas"]
+    return bumped
+
+class FeeOracle:
+    """
+    Reads eth_feeHistory at most once per block and caches the quote
+    """
+
+    def __init__(self, client, history_blocks=DEFAULT_HISTORY_BLOCKS,
+                 reward_percentile=DEFAULT_REWARD_PERCENTILE,
+                 base_fee_multiplier=DEFAULT_BASE_FEE_MULTIPLIER,
+                 ttl_blocks=DEFAULT_TTL_BLOCKS):
+        self.client = client
+        self.history_blocks = history_blocks
+        self.reward_percentile = reward_percentile
+        self.base_fee_multiplier = base_fee_multiplier
+        self.ttl_blocks = ttl_blocks
+        self._quote = None
+        self._lock = threading.Lock()
+
+    def quote(self, head=None):
+        """
+        Returns fees for the next block. With the current head block
+        number given, a cached quote is reused until it is ttl_blocks old.
+        """
+        with self._lock:
+            cached = self._quote
+            if (cached is not None and head is not None and cached.block_number is not None
+                    and head - cached.block_number < self.ttl_blocks):
+                return cached
+            history = self.client.call(
+                "eth_feeHistory",
+                [hex(self.history_blocks), "latest", [self.reward_percentile]],
+            )
+            self._quote = fees_from_history(history, 0, self.base_fee_multiplier)
+            return self._quote
+
+_oracles = {}
+_oracles_lock = threading.Lock()
+
+def get_fee_oracle(client, **kwargs):
+    """
+    Returns the shared fee oracle for a client
+    """
+    with _oracles_lock:
+        oracle = _oracles.get(client)
+        if oracle is None:
+            oracle = FeeOracle(client, **kwargs)
+            _oracles[client] = oracle
+        return oracle
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import threading
+
+# Estimate settings
+DEFAULT_MARGIN = 1.2  # Gas limit = estimate * margin
+DEFAULT_TTL_BLOCKS = 100  # Estimates are redone after this many blocks
+
+def _to_bytes(data):
+    if isinstance(data, str):
+        return bytes.fromhex(data[2:] if data.startswith("0x") else data)
+    return bytes(data)
+
+def shape_key(transaction):
+    """
+    Cache key of a transaction: contract, selector and calldata length
+    """
+    data = _to_bytes(transaction.get("data") or b"")
+    return (str(transaction["to"]).lower(), data[:4].hex(), len(data))
+
+class GasEstimateCache:
+    """
+    Runs eth_estimateGas once per calldata shape and reuses the result
+    (with a safety margin) until it is ttl_blocks old or invalidated
+    """
+
+    def __init__(self, client, margin=DEFAULT_MARGIN, ttl_blocks=DEFAULT_TTL_BLOCKS):
+        self.client = client
+        self.margin = margin
+        self.ttl_blocks = ttl_blocks
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._estimate_lock = threading.Lock()
+
+    def _cached(self, key, head):
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            gas, block = entry
+            if head is None or block is None or head - block < self.ttl_blocks:
+                return gas
+        return None
+
+    def gas_limit(self, transaction, sender, head=None):
+        """
+        Returns the gas limit for a transaction dict
+        """
+        key = shape_key(transaction)
+        gas = self._cached(key, head)
+        if gas is not None:
+            return gas
+        # Only one thread estimates, the others wait and reuse its answer
+        with self._estimate_lock:
+            gas = self._cached(key, head)
+            if gas is not None:
+                return gas
+            call = {
+                "from": sender,
+                "to": transaction["to"],
+                "value": hex(transaction.get("value", 0)),
+                "data": "0x" + _to_bytes(transaction.get("data") or b"").hex(),
+            }
+            estimate = int(self.client.call("eth_estimateGas", [call]), 16)
+            gas = int(estimate * self.margin)
+            with self._lock:
+                self._entries[key] = (gas, head)
+            return gas
+
+    def invalidate(self, transaction):
+        """
+        Drops the estimate for a transaction's shape (e.g. after a failed
+        transaction, which may have run out of gas)
+        """
+        with self._lock:
+            self._entries.pop(shape_key(transaction), None)
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_gas_cache(client, **kwargs):
+    """
+    Returns the shared gas estimate cache for a client
+    """
+    with _caches_lock:
+        cache = _caches.get(client)
+        if cache is None:
+            cache = GasEstimateCache(client, **kwargs)
+            _caches[client] = cache
+        return cache
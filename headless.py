@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Non-interactive entry point for cron jobs and containers.
+
+    python headless.py --count 10 --interval 30
+    python headless.py --config bot.json
+    python headless.py --routes routes.json --count 10
+    python headless.py --check --startup-budget 1.0
+
+Settings come from a JSON config file and/or arguments (arguments win).
+There are no prompts and no dependency checks, and web3 is only imported
+once it is needed.
+
+Exit codes:
+    0  every run confirmed on every wallet
+    1  at least one run failed
+    2  invalid settings
+    3  RPC node not reachable or no wallets
+    4  startup slower than the budget (--check)
+    130  stopped by user
+"""
+
+import time
+
+START_TIME = time.perf_counter()
+
+import argparse
+import json
+import sys
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_CONFIG = 2
+EXIT_UNAVAILABLE = 3
+EXIT_SLOW_STARTUP = 4
+EXIT_INTERRUPTED = 130
+
+# Config key -> transfer.py setting
+SETTINGS = {
+    "rpc_url": "RPC_URL",
+    "rpc_urls": "RPC_URLS",
+    "wallet_file": "WALLET_FILE",
+    "workers": "MAX_WORKERS",
+    "tx_per_wallet": "TX_PER_WALLET",
+    "max_in_flight": "MAX_IN_FLIGHT",
+    "signing_workers": "SIGNING_WORKERS",
+    "batch_size": "BATCH_SIZE",
+    "stream_chunk": "STREAM_CHUNK",
+    "metrics_file": "METRICS_FILE",
+    "metrics_json_file": "METRICS_JSON_FILE",
+    "trace_file": "TRACE_FILE",
+    "metrics_port": "METRICS_PORT",
+    "preflight": "PREFLIGHT",
+    "simulate": "SIMULATE",
+    "profile": "PROFILE",
+    "profile_mode": "PROFILE_MODE",
+}
+
+DEFAULTS = {
+    "count": 1,
+    "interval": 0,
+    "rate": None,
+    "wallet_rate": None,
+    "deadline": None,
+    "routes": None,
+    "startup_budget": 1.0,
+}
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Union Transaction Bot (headless)")
+    parser.add_argument("--config", help="JSON file with settings")
+    parser.add_argument("--count", type=int, help="number of runs (default 1)")
+    parser.add_argument("--interval", type=float,
+                        help="seconds from the start of one run to the next (default 0)")
+    parser.add_argument("--rate", type=float, help="target transactions per minute, all wallets")
+    parser.add_argument("--wallet-rate", dest="wallet_rate", type=float,
+                        help="target transactions per minute for each wallet")
+    parser.add_argument("--deadline", type=float, help="start no run after this many seconds")
+    parser.add_argument("--routes", help="JSON route table, every route runs in parallel")
+    parser.add_argument("--rpc-url", dest="rpc_url")
+    parser.add_argument("--rpc-urls", dest="rpc_urls", nargs="+",
+                        help="more endpoints for reads and send broadcast")
+    parser.add_argument("--wallet-file", dest="wallet_file")
+    parser.add_argument("--workers", type=int, help="wallets processed at the same time")
+    parser.add_argument("--tx-per-wallet", dest="tx_per_wallet", type=int)
+    parser.add_argument("--max-in-flight", dest="max_in_flight", type=int)
+    parser.add_argument("--signing-workers", dest="signing_workers", type=int)
+    parser.add_argument("--batch-size", dest="batch_size", type=int)
+    parser.add_argument("--stream-chunk", dest="stream_chunk", type=int,
+                        help="stream the wallet file this many wallets at a time")
+    parser.add_argument("--metrics-file", dest="metrics_file",
+                        help="write Prometheus text metrics here after every round")
+    parser.add_argument("--metrics-json-file", dest="metrics_json_file",
+                        help="append one JSON line of metrics per round")
+    parser.add_argument("--trace-file", dest="trace_file",
+                        help="append one JSON line per transaction with stage timings")
+    parser.add_argument("--metrics-port", dest="metrics_port", type=int,
+                        help="serve /metrics for Prometheus on this port")
+    parser.add_argument("--no-preflight", dest="preflight", action="store_false", default=None,
+                        help="do not skip wallets with too little balance")
+    parser.add_argument("--simulate", action="store_true", default=None,
+                        help="eth_call every transaction first and skip the ones that revert")
+    parser.add_argument("--profile", help="profile all runs and write PROFILE.txt and flamegraph "
+                                          "stacks (PROFILE.cpu.folded, PROFILE.wall.folded)")
+    parser.add_argument("--profile-mode", dest="profile_mode", choices=("sample", "cprofile"),
+                        help="sample: all threads with flamegraph stacks (default), "
+                             "cprofile: PROFILE.pstats")
+    parser.add_argument("--startup-budget", dest="startup_budget", type=float,
+                        help="seconds allowed from start to the first RPC call (default 1.0)")
+    parser.add_argument("--check", action="store_true",
+                        help="only connect, report startup time and exit")
+    return parser
+
+def parse_args(argv):
+    return build_parser().parse_args(argv)
+
+def _expected_type(action):
+    # Config values must have the type the matching argument parses to
+    if isinstance(action.const, bool):
+        return (bool,), "true or false"
+    if action.type is int:
+        return (int,), "an integer"
+    if action.type is float:
+        return (int, float), "a number"
+    if action.nargs == "+":
+        return (list,), "a list of strings"
+    return (str,), "a string"
+
+def check_types(config, path):
+    """
+    Checks every config value against the type of its argument
+    """
+    actions = {action.dest: action for action in build_parser()._actions}
+    for key, value in config.items():
+        action = actions[key]
+        types, description = _expected_type(action)
+        if value is None and (DEFAULTS.get(key, 0) is None or types == (str,)):
+            continue
+        valid = isinstance(value, types) and (bool in types or not isinstance(value, bool))
+        if valid and types == (list,):
+            valid = all(isinstance(item, str) for item in value)
+        if not valid:
+            raise ValueError(f"{key} must be {description} in {path}, not {json.dumps(value)}")
+        if action.choices is not None and value not in action.choices:
+            raise ValueError(f"{key} must be one of {', '.join(action.choices)} in {path}")
+
+def load_settings(args):
+    """
+    Merges defaults, the config file and arguments
+    """
+    settings = dict(DEFAULTS)
+    if args.config:
+        with open(args.config, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        if not isinstance(config, dict):
+            raise ValueError(f"{args.config} must hold a JSON object")
+        unknown = set(config) - set(SETTINGS) - set(DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown settings in {args.config}: {', '.join(sorted(unknown))}")
+        check_types(config, args.config)
+        settings.update(config)
+    for key, value in vars(args).items():
+        if value is not None and key not in ("config", "check"):
+            settings[key] = value
+    if settings["count"] < 1:
+        raise ValueError("count must be at least 1")
+    if settings["interval"] < 0:
+        raise ValueError("interval must not be negative")
+    for key in ("rate", "wallet_rate", "deadline"):
+        if settings[key] is not None and settings[key] <= 0:
+            raise ValueError(f"{key} must be positive")
+    return settings
+
+def report_startup(client, budget):
+    """
+    Prints the time from process start to the first RPC call
+    """
+    if client.first_request_time is None:
+        return True
+    startup = client.first_request_time - START_TIME
+    within = startup <= budget
+    print(f"Startup: {startup:.3f}s to first RPC call (budget {budget:.3f}s)"
+          + ("" if within else " - over budget!"))
+    return within
+
+def run(argv=None):
+    args = parse_args(argv)
+    try:
+        settings = load_settings(args)
+    except (OSError, ValueError) as e:
+        print(f"Invalid settings: {e}")
+        return EXIT_CONFIG
+
+    routes = [None]
+    if settings["routes"]:
+        from routes import load_routes
+        try:
+            routes = load_routes(settings["routes"])
+        except (OSError, ValueError) as e:
+            print(f"Invalid settings: {e}")
+            return EXIT_CONFIG
+
+    import transfer
+    for key, name in SETTINGS.items():
+        if key in settings:
+            setattr(transfer, name, settings[key])
+    within_budget = True
+    for route in routes:
+        client = transfer.get_rpc_client(route)
+        connected = client.is_connected()
+        within_budget = report_startup(client, settings["startup_budget"]) and within_budget
+        if not connected:
+            print(f"RPC node not reachable: {client.endpoint}")
+            return EXIT_UNAVAILABLE
+    if args.check:
+        return EXIT_OK if within_budget else EXIT_SLOW_STARTUP
+    for route in routes:
+        if not transfer.load_wallets(route.wallet_file if route else None):
+            print("No wallets found!")
+            return EXIT_UNAVAILABLE
+
+    import main
+    pacing = (settings["count"], settings["interval"], settings["rate"], settings["wallet_rate"],
+              settings["deadline"])
+    if routes == [None]:
+        successful, failed = main.run_transactions(*pacing)
+    else:
+        successful, failed = main.run_routes(routes, *pacing)
+    return EXIT_OK if failed == 0 else EXIT_FAILED
+
+if __name__ == "__main__":
+    try:
+        code = run()
+    except KeyboardInterrupt:
+        print("\nStopped by user!")
+        code = EXIT_INTERRUPTED
+    sys.exit(code)
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import atexit
+import json
+import queue
+import sqlite3
+import threading
+import time
+
+from receipts import normalize_receipt
+
+# Statuses written for a transaction hash, in the order they can happen
+SENT = "sent"
+CONFIRMED = "confirmed"
+FAILED = "failed"
+DROPPED = "dropped"
+REPLACED = "replaced"
+
+# Events written to disk in one transaction at most
+WRITE_BATCH = 256
+# Events waiting for the writer before record() blocks
+MAX_QUEUED = 65536
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    time REAL NOT NULL,
+    address TEXT NOT NULL,
+    nonce INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL,
+    status TEXT NOT NULL,
+    fee INTEGER,
+    tx TEXT
+);
+CREATE INDEX IF NOT EXISTS events_tx_hash ON events (tx_hash);
+"""
+
+INSERT = ("INSERT INTO events (time, address, nonce, tx_hash, status, fee, tx) "
+          "VALUES (?, ?, ?, ?, ?, ?, ?)")
+
+def _encode(transaction):
+    return json.dumps({key: "0x" + value.hex() if isinstance(value, (bytes, bytearray)) else value
+                       for key, value in transaction.items()})
+
+def _fee(transaction):
+    if transaction is None:
+        return None
+    return transaction.get("maxFeePerGas", transaction.get("gasPrice"))
+
+def _row(address, nonce, tx_hash, status, transaction):
+    return (time.time(), address.lower(), nonce, tx_hash.lower(), status, _fee(transaction),
+            _encode(transaction) if transaction is not None else None)
+
+class Journal:
+    """
+    Append-only SQLite log (WAL mode) of every transaction stage.
+    record_now() commits before it returns and is used for SENT, which
+    is written before the broadcast, so a transaction the node may have
+    is always on disk. record() only puts later events on a queue, a
+    writer thread commits them in batches. A lost later event only means
+    reconcile() checks that transaction against the chain again.
+    """
+
+    def __init__(self, path="journal.db"):
+        self.path = path
+        self._queue = queue.Queue(maxsize=MAX_QUEUED)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="journal", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def record(self, address, nonce, tx_hash, status, transaction=None):
+        """
+        Adds one event, the transaction is stored with SENT events
+        """
+        self._queue.put(_row(address, nonce, tx_hash, status, transaction))
+
+    def record_now(self, address, nonce, tx_hash, status, transaction=None):
+        """
+        Adds one event and commits it before returning. sqlite3.Error is
+        raised, the caller must not go on as if it was written.
+        """
+        with self._lock, self._db:
+            self._db.execute(INSERT, _row(address, nonce, tx_hash, status, transaction))
+
+    def _run(self):
+        while True:
+            events = [self._queue.get()]
+            while len(events) < WRITE_BATCH:
+                try:
+                    events.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in events
+            rows = [event for event in events if event is not None]
+            try:
+                if rows:
+                    with self._lock, self._db:
+                        self._db.executemany(INSERT, rows)
+            except sqlite3.Error as e:
+                print(f"Journal could not be written: {e}")
+            finally:
+                for _ in events:
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def flush(self):
+        """
+        Waits until every recorded event is on disk
+        """
+        self._queue.join()
+
+    def unfinished(self):
+        """
+        Returns the transactions whose last event is SENT, oldest first
+        """
+        self.flush()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT e.time, e.address, e.nonce, e.tx_hash, e.tx FROM events e "
+                "JOIN (SELECT MAX(id) AS id FROM events GROUP BY tx_hash) last ON e.id = last.id "
+                "WHERE e.status = ? ORDER BY e.id", (SENT,)).fetchall()
+        return [{
+            "time": sent_time,
+            "address": address,
+            "nonce": nonce,
+            "tx_hash": tx_hash,
+            "transaction": json.loads(tx) if tx else None,
+        } for sent_time, address, nonce, tx_hash, tx in rows]
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        self._db.close()
+
+def _to_int(value):
+    if isinstance(value, str):
+        return int(value, 16)
+    return value
+
+def reconcile(client, journal, batch_size=100):
+    """
+    Checks every unfinished journal entry against the chain with batched
+    receipt and nonce lookups. Mined and replaced entries are recorded,
+    the ones still waiting in the mempool are returned.
+    """
+    entries = journal.unfinished()
+    if not entries:
+        return []
+    addresses = list(dict.fromkeys(entry["address"] for entry in entries))
+    calls = [("eth_getTransactionReceipt", [entry["tx_hash"]]) for entry in entries]
+    calls += [("eth_getTransactionCount", [address, "latest"]) for address in addresses]
+    results = client.batch(calls, batch_size)
+    receipts = results[:len(entries)]
+    mined_nonces = dict(zip(addresses, results[len(entries):]))
+    settled = set()
+    for entry, receipt in zip(entries, receipts):
+        if receipt and not isinstance(receipt, Exception):
+            status = CONFIRMED if normalize_receipt(receipt)["status"] == 1 else FAILED
+            journal.record(entry["address"], entry["nonce"], entry["tx_hash"], status)
+            settled.add((entry["address"], entry["nonce"]))
+    pending = []
+    for entry, receipt in zip(entries, receipts):
+        key = (entry["address"], entry["nonce"])
+        if receipt and not isinstance(receipt, Exception):
+            continue
+        if key in settled:
+            # Another transaction with the same nonce made it
+            journal.record(entry["address"], entry["nonce"], entry["tx_hash"], REPLACED)
+            continue
+        mined = mined_nonces.get(entry["address"])
+        if isinstance(mined, Exception) or isinstance(receipt, Exception):
+            pending.append(entry)  # Unknown, check again on the next start
+        elif _to_int(mined) > entry["nonce"]:
+            # The nonce is used but not by this transaction
+            journal.record(entry["address"], entry["nonce"], entry["tx_hash"], DROPPED)
+        else:
+            pending.append(entry)
+    # Only the newest transaction per nonce is worth waiting for
+    latest = {(entry["address"], entry["nonce"]): entry for entry in pending}
+    return list(latest.values())
+
+_journals = {}
+_journals_lock = threading.Lock()
+
+def get_journal(path="journal.db"):
+    """
+    Returns the shared journal for a file, creating it on first use
+    """
+    with _journals_lock:
+        journal = _journals.get(path)
+        if journal is None:
+            journal = Journal(path)
+            _journals[path] = journal
+        return journal
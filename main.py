@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import time
+import contextlib
 import os
 import sys
 from datetime import datetime
@@ -99,25 +99,19 @@ def check_wallet_file():
             print("0x1234567890abcdef,abcdef1234567890")
             print_continue("After creating wallet.txt, press Enter...")
             continue
-        with open("wallet.txt", "r", encoding="utf-8") as f:
-            lines = [line.strip() for line in f if line.strip()]
-        if not lines:
-            print("wallet.txt is empty! Please add a valid wallet.")
-            print_continue("After editing wallet.txt, press Enter...")
-            continue
-        valid = False
-        for line in lines:
-            if ',' in line:
-                address, priv = line.split(',', 1)
-                if address.startswith('0x') and len(address) >= 10 and len(priv) >= 10:
-                    valid = True
-                    break
+        # Parsed and validated once, transfer.py reuses the same store
+        from wallets import get_wallet_store
+        store = get_wallet_store("wallet.txt")
+        store.reload_if_changed()
+        for line_number, error in store.errors:
+            print(f"Line {line_number}: {error}")
+        valid = len(store) > 0
         if not valid:
-            print("wallet.txt format is invalid! Each line should be:")
+            print("wallet.txt has no valid wallet! Each line should be:")
             print("0xWalletAddress,PrivateKey (e.g. 0x123...,abcdef1234567890)")
             print_continue("After fixing wallet.txt, press Enter...")
             continue
-        print("wallet.txt is valid!")
+        print(f"wallet.txt is valid! {len(store)} wallets loaded.")
         print_continue()
         break
 
@@ -221,33 +215,105 @@ def get_user_input():
         else:
             print("Enter 'y' or 'n'!")
 
-def run_transactions(transaction_count, interval):
-    print(f"\nStarting transactions...")
+def run_transactions(transaction_count, interval, rate=None, wallet_rate=None, deadline=None,
+                     route=None):
+    """
+    Runs transfer.main() transaction_count times. Runs start every interval
+    seconds (start to start). Single sends are spaced to stay within rate
+    (transactions per minute) and wallet_rate (per wallet). No run starts
+    after deadline seconds. A route replaces the chain, contract and
+    payload settings of transfer.py.
+    """
+    # Output of parallel routes is told apart by the route name
+    label = f"[{route.name}] " if route is not None else ""
+    print(f"\n{label}Starting transactions...")
     print(f"Start: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("─" * 44)
     successful_transactions = 0
     failed_transactions = 0
-    for i in range(transaction_count):
-        print(f"\nTransaction {i+1}/{transaction_count}")
-        print(f"Time: {datetime.now().strftime('%H:%M:%S')}")
-        try:
-            import transfer
-            transfer.main()
-            successful_transactions += 1
-            print(f"Transaction {i+1} successful!")
-        except Exception as e:
-            failed_transactions += 1
-            print(f"Transaction {i+1} failed: {e}")
-        if i < transaction_count - 1:
-            print(f"Waiting {interval} seconds...")
-            time.sleep(interval)
+    import transfer
+    from executor import RoundTotals
+    from pacing import Pacer, SendPacer
+    from profiling import profiled
+    # One pooled connection shared by every run
+    client = transfer.get_rpc_client(route)
+    # Transactions left pending by an earlier process are settled first
+    transfer.recover(client, route)
+    # Runs start on the interval schedule, the rates are kept per send
+    pacer = Pacer(interval or 0.0, deadline, rate)
+    send_pacer = SendPacer(rate, wallet_rate)
+    # Every run is profiled as one with PROFILE set
+    profile = profiled(transfer.PROFILE, transfer.PROFILE_MODE, transfer.PROFILE_INTERVAL) \
+        if transfer.PROFILE else contextlib.nullcontext()
+    with profile:
+        for i in range(transaction_count):
+            delay = pacer.next_delay()
+            if delay is None:
+                print("\nDeadline reached, no more runs.")
+                break
+            if delay > 0:
+                print(f"Waiting {delay:.1f} seconds...")
+            pacer.wait()
+            print(f"\n{label}Transaction {i+1}/{transaction_count}")
+            print(f"Time: {datetime.now().strftime('%H:%M:%S')}")
+            try:
+                results = transfer.main(client=client, route=route, pacer=send_pacer)
+                # Streamed rounds only return their totals
+                totals = results if isinstance(results, RoundTotals) else RoundTotals.of(results)
+                pacer.record(totals.sent)
+                # Wallets skipped by the pre-flight check do not fail the run
+                active = totals.wallets - totals.skipped
+                confirmed = totals.ok
+                if active and confirmed == active:
+                    successful_transactions += 1
+                    print(f"{label}Transaction {i+1} successful! ({confirmed}/{active} wallets confirmed)")
+                else:
+                    failed_transactions += 1
+                    print(f"{label}Transaction {i+1} failed: {confirmed}/{active} wallets confirmed")
+            except Exception as e:
+                failed_transactions += 1
+                print(f"{label}Transaction {i+1} failed: {e}")
+            print(label + pacer.report())
     print("\n─" * 44)
-    print("TRANSACTION SUMMARY")
+    print(f"{label}TRANSACTION SUMMARY")
     print("─" * 44)
     print(f"Successful: {successful_transactions}")
     print(f"Failed: {failed_transactions}")
     print(f"End: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("─" * 44)
+    return successful_transactions, failed_transactions
+
+def run_routes(routes, transaction_count, interval, rate=None, wallet_rate=None, deadline=None):
+    """
+    Runs run_transactions() for every route at the same time, one thread
+    per route. Each route has its own connections, nonces and journal.
+    Returns the successful and failed runs summed over all routes.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    import transfer
+    from profiling import profiled
+    profile = profiled(transfer.PROFILE, transfer.PROFILE_MODE, transfer.PROFILE_INTERVAL) \
+        if transfer.PROFILE else contextlib.nullcontext()
+    with profile, ThreadPoolExecutor(max_workers=len(routes), thread_name_prefix="route") as executor:
+        futures = {route.name: executor.submit(run_transactions, transaction_count, interval, rate,
+                                               wallet_rate, deadline, route)
+                   for route in routes}
+    successful_transactions = 0
+    failed_transactions = 0
+    print("ROUTE SUMMARY")
+    print("─" * 44)
+    for name, future in futures.items():
+        try:
+            successful, failed = future.result()
+        except Exception as e:
+            print(f"{name}: stopped - {e}")
+            failed_transactions += 1
+            continue
+        print(f"{name}: {successful} successful, {failed} failed")
+        successful_transactions += successful
+        failed_transactions += failed
+    print("─" * 44)
+    return successful_transactions, failed_transactions
 
 def main():
     print_step_info("Setup and requirements info:")
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import bisect
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# Histogram buckets in seconds, from a fast local step to a slow confirmation
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+                   30.0, 60.0, 120.0, 300.0)
+# Finished traces kept in memory until they are written
+TRACE_BUFFER = 100000
+
+def _label_text(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra is not None:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in pairs) + "}"
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric:
+    """
+    Base for metrics with a fixed set of label names
+    """
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def samples(self):
+        with self._lock:
+            return list(self._values.items())
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def total(self):
+        with self._lock:
+            return sum(self._values.values())
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labels=(), function=None):
+        super().__init__(name, help_text, labels)
+        self.function = function
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self):
+        if self.function is not None:
+            return [((), self.function())]
+        return super().samples()
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts (last one is +Inf), sum, count
+                state = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._values[key] = state
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self):
+        with self._lock:
+            return [(key, (list(counts), total, count))
+                    for key, (counts, total, count) in self._values.items()]
+
+class Registry:
+    """
+    Named metrics of one process, exported as Prometheus text or JSON
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help_text, labels, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, help_text, labels, **kwargs)
+                self._metrics[name] = metric
+            return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self._get(Counter, name, help_text, labels)
+
+    def gauge(self, name, help_text, labels=(), function=None):
+        return self._get(Gauge, name, help_text, labels, function=function)
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, help_text, labels, buckets=buckets)
+
+    def metrics(self):
+        with self._lock:
+            return list(self._metrics.values())
+
+    def prometheus(self):
+        """
+        Returns every metric in the Prometheus text exposition format
+        """
+        lines = []
+        for metric in self.metrics():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for key, value in metric.samples():
+                if metric.kind != "histogram":
+                    lines.append(f"{metric.name}{_label_text(metric.labels, key)} {_number(value)}")
+                    continue
+                counts, total, count = value
+                cumulative = 0
+                for bound, bucket_count in zip(metric.buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    labels = _label_text(metric.labels, key, ("le", _number(bound)))
+                    lines.append(f"{metric.name}_bucket{labels} {cumulative}")
+                labels = _label_text(metric.labels, key)
+                lines.append(f"{metric.name}_sum{labels} {_number(total)}")
+                lines.append(f"{metric.name}_count{labels} {count}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """
+        Returns every metric as a JSON-serializable dict
+        """
+        snapshot = {"time": time.time(), "metrics": {}}
+        for metric in self.metrics():
+            values = []
+            for key, value in metric.samples():
+                labels = dict(zip(metric.labels, key))
+                if metric.kind == "histogram":
+                    counts, total, count = value
+                    values.append({"labels": labels, "count": count, "sum": total,
+                                   "buckets": dict(zip(map(_number, metric.buckets + (float("inf"),)),
+                                                       counts))})
+                else:
+                    values.append({"labels": labels, "value": value})
+            snapshot["metrics"][metric.name] = {"type": metric.kind, "values": values}
+        return snapshot
+
+    def write_prometheus(self, path):
+        """
+        Writes the Prometheus text to a file (e.g. for the node_exporter
+        textfile collector). The file is replaced atomically.
+        """
+        temp_path = path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus())
+        os.replace(temp_path, path)
+
+    def write_json_line(self, path):
+        """
+        Appends one snapshot as a JSON line
+        """
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(self.snapshot()) + "\n")
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "bot_stage_seconds", "Time spent in each transaction pipeline stage", ("stage",))
+TRANSACTIONS = REGISTRY.counter(
+    "bot_transactions_total", "Transactions by final status", ("status",))
+ERRORS = REGISTRY.counter(
+    "bot_errors_total", "Errors by pipeline stage and error class", ("stage", "error"))
+IN_FLIGHT = REGISTRY.gauge(
+    "bot_in_flight_transactions", "Sent transactions waiting for a receipt")
+RPC_REQUESTS = REGISTRY.counter(
+    "bot_rpc_requests_total", "JSON-RPC requests by endpoint and method", ("endpoint", "method"))
+RPC_SECONDS = REGISTRY.histogram(
+    "bot_rpc_request_seconds", "JSON-RPC request latency by method, retries included",
+    ("method",))
+
+class _RateMeter:
+    # Requests per second since the previous read
+    def __init__(self, counter):
+        self.counter = counter
+        self._last = (time.monotonic(), 0)
+        self._rate = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            now, total = time.monotonic(), self.counter.total()
+            last_time, last_total = self._last
+            if now - last_time >= 1.0:
+                self._rate = (total - last_total) / (now - last_time)
+                self._last = (now, total)
+            return self._rate
+
+RPC_RATE = REGISTRY.gauge("bot_rpc_requests_per_second",
+                          "JSON-RPC requests per second since the previous export",
+                          function=_RateMeter(RPC_REQUESTS))
+
+def count_error(stage, error):
+    """
+    Counts an error under its stage and exception class
+    """
+    ERRORS.inc(stage=stage, error=type(error).__name__)
+
+class Trace:
+    """
+    Spans of one transaction, from nonce to confirmation
+    """
+    __slots__ = ("address", "nonce", "tx_hash", "status", "start", "spans")
+
+    def __init__(self, address, nonce=None):
+        self.address = address
+        self.nonce = nonce
+        self.tx_hash = None
+        self.status = None
+        self.start = time.perf_counter()
+        self.spans = []
+
+    def finish(self, status, tracer=None):
+        self.status = status
+        TRANSACTIONS.inc(status=status)
+        (tracer or TRACER).add(self)
+
+    def to_dict(self):
+        return {
+            "address": self.address,
+            "nonce": self.nonce,
+            "tx_hash": self.tx_hash,
+            "status": self.status,
+            "spans": [{"name": name, "start": round(start - self.start, 6),
+                       "duration": round(duration, 6)} for name, start, duration in self.spans],
+        }
+
+class Stage:
+    """
+    Times a pipeline stage into bot_stage_seconds and, if given, a trace:
+
+        with Stage("sign", trace):
+            ...
+    """
+    __slots__ = ("name", "trace", "_start")
+
+    def __init__(self, name, trace=None):
+        self.name = name
+        self.trace = trace
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        duration = time.perf_counter() - self._start
+        STAGE_SECONDS.observe(duration, stage=self.name)
+        if self.trace is not None:
+            self.trace.spans.append((self.name, self._start, duration))
+        return False
+
+class Tracer:
+    """
+    Collects finished traces and writes them as JSON lines. Nothing is
+    kept while disabled.
+    """
+
+    def __init__(self, buffer=TRACE_BUFFER):
+        self.enabled = False
+        self._traces = deque(maxlen=buffer)
+
+    def add(self, trace):
+        if self.enabled:
+            self._traces.append(trace)
+
+    def write(self, path):
+        """
+        Appends the traces finished since the last write
+        """
+        traces = []
+        while self._traces:
+            traces.append(self._traces.popleft())
+        if traces:
+            with open(path, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(trace.to_dict()) + "\n" for trace in traces)
+        return len(traces)
+
+TRACER = Tracer()
+
+def stage_summary():
+    """
+    Average time per stage for printing
+    """
+    parts = []
+    for key, (counts, total, count) in STAGE_SECONDS.samples():
+        if count:
+            parts.append(f"{key[0]} {total / count * 1000:.0f}ms")
+    return "Stage time (avg): " + ", ".join(parts) if parts else None
+
+_servers = {}
+_servers_lock = threading.Lock()
+
+def serve_metrics(port, registry=REGISTRY):
+    """
+    Serves the registry at http://0.0.0.0:port/metrics for Prometheus,
+    started once per port in a background thread
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = registry.prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    with _servers_lock:
+        server = _servers.get(port)
+        if server is None:
+            server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+            threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+            _servers[port] = server
+        return server
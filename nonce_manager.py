@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import threading
+
+# How many unconfirmed transactions a wallet may have at once
+DEFAULT_MAX_IN_FLIGHT = 4
+
+# Node errors that mean our local nonce counter no longer matches the chain
+NONCE_ERRORS = (
+    "nonce too low",
+    "nonce too high",
+    "invalid nonce",
+    "replacement transaction underpriced",
+)
+
+def is_nonce_error(error):
+    """
+    Checks if an error was caused by a stale nonce
+    """
+    message = str(error).lower()
+    return any(text in message for text in NONCE_ERRORS)
+
+class NonceManager:
+    """
+    Hands out nonces for one wallet from a local counter.
+    The pending nonce is fetched once, then increased in memory.
+    """
+
+    def __init__(self, w3, address, max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+        self.w3 = w3
+        self.address = address
+        self.max_in_flight = max_in_flight
+        self.in_flight = set()
+        self._next = None
+        self._lock = threading.Lock()
+
+    def _fetch(self):
+        return self.w3.eth.get_transaction_count(self.address, "pending")
+
+    def resync(self):
+        """
+        Reloads the pending nonce from the node
+        """
+        with self._lock:
+            self._resync()
+
+    def _resync(self):
+        pending = self._fetch()
+        self._next = pending
+        # Anything below the pending nonce is already mined or replaced
+        self.in_flight = {n for n in self.in_flight if n >= pending}
+
+    def seed(self, pending):
+        """
+        Uses a pending nonce fetched elsewhere (e.g. in a batch request)
+        """
+        with self._lock:
+            if self._next is None or pending > self._next:
+                self._next = pending
+                self.in_flight = {n for n in self.in_flight if n >= pending}
+
+    def available(self):
+        """
+        Returns how many more transactions can be sent right now
+        """
+        with self._lock:
+            return max(self.max_in_flight - len(self.in_flight), 0)
+
+    def next_nonce(self):
+        """
+        Returns the next nonce and marks it as in flight
+        """
+        with self._lock:
+            if self._next is None:
+                self._resync()
+            nonce = self._next
+            self._next += 1
+            self.in_flight.add(nonce)
+            return nonce
+
+    def confirm(self, nonce):
+        """
+        Marks a nonce as mined (successful or reverted)
+        """
+        with self._lock:
+            self.in_flight.discard(nonce)
+
+    def release(self, nonce, error=None):
+        """
+        Gives back a nonce whose transaction was never accepted
+        """
+        with self._lock:
+            self.in_flight.discard(nonce)
+            if error is not None and is_nonce_error(error):
+                self._resync()
+            elif self._next == nonce + 1:
+                # Nothing was issued after it, so it can simply be reused
+                self._next = nonce
+            else:
+                # Later nonces are waiting on this one, ask the node again
+                self._resync()
+
+    def dropped(self, nonce):
+        """
+        Handles a transaction that never got a receipt
+        """
+        with self._lock:
+            self.in_flight.discard(nonce)
+            self._resync()
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+def get_nonce_manager(w3, address, max_in_flight=DEFAULT_MAX_IN_FLIGHT, chain_id=None):
+    """
+    Returns the shared nonce manager for a wallet on a chain
+    """
+    # The same wallet has a separate nonce on every chain
+    key = (chain_id, address.lower())
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = NonceManager(w3, address, max_in_flight)
+            _managers[key] = manager
+        else:
+            manager.w3 = w3
+            manager.max_in_flight = max_in_flight
+        return manager
+
+def forget_nonce_manager(address, chain_id=None):
+    """
+    Drops a wallet's nonce manager when nothing is in flight, so a
+    streamed round does not keep one per wallet
+    """
+    key = (chain_id, address.lower())
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is not None and manager.available() == manager.max_in_flight:
+            del _managers[key]
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+
+class SendPacer:
+    """
+    Spaces single sends on the monotonic clock. rate is transactions per
+    minute for all wallets together, wallet_rate is transactions per
+    minute for each wallet. Shared by every wallet thread of a route, so
+    wallets skipped before sending do not use up any of the rate.
+    """
+
+    def __init__(self, rate=None, wallet_rate=None):
+        self.interval = 60.0 / rate if rate else 0.0
+        self.wallet_interval = 60.0 / wallet_rate if wallet_rate else 0.0
+        self._next = 0.0
+        self._wallet_next = {}
+        self._lock = threading.Lock()
+
+    def wait(self, address):
+        """
+        Sleeps until address may send its next transaction
+        """
+        if not self.interval and not self.wallet_interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            # Time not used by anyone is not made up for with a burst
+            slot = max(self._next, now)
+            if self.wallet_interval:
+                key = address.lower()
+                slot = max(slot, self._wallet_next.get(key, 0.0))
+                self._wallet_next[key] = slot + self.wallet_interval
+                if len(self._wallet_next) > 4096:
+                    # Wallets already allowed to send again need no entry
+                    self._wallet_next = {k: t for k, t in self._wallet_next.items() if t > now}
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+class Pacer:
+    """
+    Starts runs on a fixed schedule on the monotonic clock, so slow runs
+    shorten the following wait instead of shifting every later run
+    """
+
+    def __init__(self, period, deadline=None, target_rate=None):
+        self.period = period
+        self.deadline = deadline
+        self.target_rate = target_rate
+        self.start = time.monotonic()
+        self.runs = 0
+        self.transactions = 0
+        self._next = self.start
+
+    def next_delay(self):
+        """
+        Seconds until the next run is due, None if it would start after
+        the deadline
+        """
+        now = time.monotonic()
+        if self._next < now - self.period:
+            # More than a run behind: start again from now instead of bursting
+            self._next = now
+        if self.deadline is not None and self._next - self.start > self.deadline:
+            return None
+        return max(self._next - now, 0.0)
+
+    def wait(self):
+        """
+        Sleeps until the next run is due.
+        Returns False if the deadline would pass first.
+        """
+        delay = self.next_delay()
+        if delay is None:
+            return False
+        if delay > 0:
+            time.sleep(delay)
+        self._next += self.period
+        return True
+
+    def record(self, transactions):
+        """
+        Counts the transactions sent by a finished run
+        """
+        self.runs += 1
+        self.transactions += transactions
+
+    def achieved_rate(self):
+        """
+        Transactions per minute since the first run started. Time is
+        counted at least up to the end of the scheduled slots, so the
+        first runs do not show a burst rate.
+        """
+        elapsed = max(time.monotonic() - self.start, self.runs * self.period)
+        return 60.0 * self.transactions / elapsed if elapsed > 0 else 0.0
+
+    def report(self):
+        text = f"Rate: {self.achieved_rate():.1f} tx/min"
+        if self.target_rate:
+            text += f" (target {self.target_rate:.1f} tx/min)"
+        return text
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from dataclasses import dataclass, field
+
+from client import DEFAULT_BATCH_SIZE
+
+@dataclass
+class RoundSnapshot:
+    """
+    Gas price, head block, pending nonces and balances fetched at the
+    start of a round
+    """
+    gas_price: int = None
+    block_number: int = None
+    nonces: dict = field(default_factory=dict)
+    balances: dict = field(default_factory=dict)
+
+    def nonce(self, address):
+        return self.nonces.get(address.lower())
+
+    def balance(self, address):
+        return self.balances.get(address.lower())
+
+def _to_int(value):
+    if isinstance(value, str):
+        return int(value, 16)
+    return value
+
+def prefetch_round(client, addresses, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Gets every wallet's pending nonce and balance plus one gas price
+    and the head block number with JSON-RPC batch requests
+    """
+    snapshot = RoundSnapshot()
+    addresses = list(dict.fromkeys(address.lower() for address in addresses))
+    calls = [("eth_gasPrice", []), ("eth_blockNumber", [])]
+    for address in addresses:
+        calls.append(("eth_getTransactionCount", [address, "pending"]))
+        calls.append(("eth_getBalance", [address, "latest"]))
+    try:
+        results = client.batch(calls, batch_size)
+    except Exception as e:
+        print(f"Batch prefetch failed, falling back to single requests: {e}")
+        return snapshot
+    if not isinstance(results[0], Exception):
+        snapshot.gas_price = _to_int(results[0])
+    if not isinstance(results[1], Exception):
+        snapshot.block_number = _to_int(results[1])
+    for i, address in enumerate(addresses):
+        nonce, balance = results[2 + 2 * i], results[3 + 2 * i]
+        if not isinstance(nonce, Exception):
+            snapshot.nonces[address] = _to_int(nonce)
+        if not isinstance(balance, Exception):
+            snapshot.balances[address] = _to_int(balance)
+    return snapshot
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from client import DEFAULT_BATCH_SIZE, RpcError
+from metrics import ERRORS
+
+def format_eth(wei):
+    return f"{wei / 10 ** 18:.6f}"
+
+def required_balance(count, value, gas_limit, max_fee):
+    """
+    Wei a wallet needs for count transactions at the worst-case fee
+    """
+    return count * (value + gas_limit * max_fee)
+
+def is_revert(error):
+    """
+    Checks if an eth_call error is the call reverting, not the node
+    failing to run it (rate limits, unknown method, missing answer)
+    """
+    return error.code == 3 or "revert" in str(error).lower()
+
+def preflight(client, wallets, snapshot, value, gas_limit, max_fee, counts=None,
+              build_call=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Drops wallets that would fail before anything is signed.
+    Balances come from the round snapshot. With build_call(wallet) given,
+    every remaining wallet's call is also simulated in one batched
+    eth_call. Returns (ready wallets, {address: skip reason}).
+    """
+    ready = []
+    skipped = {}
+    for wallet in wallets:
+        address = wallet["address"]
+        if address in skipped:
+            continue
+        balance = snapshot.balance(address)
+        if balance is not None and max_fee is not None:
+            count = counts.get(address.lower(), 1) if counts else 1
+            needed = required_balance(count, value, gas_limit, max_fee)
+            if balance < needed:
+                skipped[address] = (f"insufficient balance: {format_eth(balance)} ETH, "
+                                    f"needs {format_eth(needed)} ETH")
+                ERRORS.inc(stage="preflight", error="InsufficientBalance")
+                continue
+        ready.append(wallet)
+    if build_call is None or not ready:
+        return ready, skipped
+    unique = list({wallet["address"].lower(): wallet for wallet in ready}.values())
+    try:
+        results = client.batch([("eth_call", [build_call(wallet), "latest"]) for wallet in unique],
+                               batch_size)
+    except Exception as e:
+        # Without a simulation nobody is skipped
+        print(f"Simulation could not be run: {e}")
+        return ready, skipped
+    reverted = {}
+    failed = 0
+    error = None
+    for wallet, result in zip(unique, results):
+        if isinstance(result, RpcError):
+            if is_revert(result):
+                reverted[wallet["address"].lower()] = f"simulation reverted: {result}"
+                ERRORS.inc(stage="preflight", error="Reverted")
+            else:
+                failed += 1
+                error = result
+    if failed:
+        # Not a verdict on the wallet, so it is sent anyway
+        print(f"Simulation could not be run for {failed} wallets: {error}")
+    if reverted:
+        for wallet in ready:
+            reason = reverted.get(wallet["address"].lower())
+            if reason is not None:
+                skipped[wallet["address"]] = reason
+        ready = [wallet for wallet in ready if wallet["address"].lower() not in reverted]
+    return ready, skipped
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import cProfile
+import io
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds between two samples of every thread's stack
+DEFAULT_INTERVAL = 0.01
+# Rows in each table of the report
+DEFAULT_TOP = 15
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Where time goes, matched on the innermost frame whose file is listed.
+# Native code (secp256k1, the C JSON scanner, socket reads) shows up as
+# the Python frame that called it.
+CATEGORIES = (
+    ("import", ("<frozen importlib",)),
+    ("calldata", ("/calldata.py",)),
+    ("sign/rlp", ("/eth_account/", "/eth_keys/", "/rlp/", "/eth_rlp/", "/coincurve/",
+                  "/eth_hash/", "/Crypto/", "/signing.py")),
+    ("json", ("/json/",)),
+    ("socket i/o", ("/socket.py", "/ssl.py", "/selectors.py", "/http/client.py")),
+    ("http", ("/requests/", "/urllib3/")),
+    ("web3", ("/web3/",)),
+    ("eth utils", ("/eth_utils/", "/eth_abi/", "/hexbytes/", "/eth_typing/", "/cytoolz/",
+                   "/toolz/")),
+    ("sqlite", ("/sqlite3/", "/journal.py")),
+    ("waiting", ("/threading.py", "/queue.py", "/concurrent/futures/")),
+)
+
+# Innermost frames of a thread that is blocked rather than computing
+BLOCKING_FILES = ("/socket.py", "/ssl.py", "/selectors.py", "/threading.py", "/queue.py")
+
+def _thread_clock(ident):
+    # CPU time of another thread, where the OS has per-thread clocks
+    try:
+        return time.pthread_getcpuclockid(ident)
+    except (AttributeError, OSError):
+        return None
+
+def _category(filenames):
+    for filename in filenames:
+        for name, parts in CATEGORIES:
+            if any(part in filename for part in parts):
+                return name
+        if filename.startswith(ROOT):
+            return "bot"
+    return "other"
+
+class SamplingProfiler:
+    """
+    Samples the stack of every thread each interval and charges the wall
+    time and, where the OS has per-thread CPU clocks, the CPU time since
+    the previous sample to that stack. Wall minus CPU is time spent
+    waiting (socket reads, locks, sleeps). CPU used by a thread that is
+    now blocked goes to the stack it had in the previous sample.
+    """
+
+    def __init__(self, interval=DEFAULT_INTERVAL):
+        self.interval = interval
+        self.samples = 0
+        self.cpu_clocks = True
+        # (thread, frame labels root first) -> [wall, cpu]
+        self._stacks = {}
+        self._labels = {}
+        self._own = set()
+        self._clocks = {}
+        self._last_stacks = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            filename = code.co_filename.replace("\\", "/")
+            label = (f"{code.co_name} ({os.path.basename(filename)}:{code.co_firstlineno})", filename)
+            self._labels[code] = label
+            if filename.startswith(ROOT) and "/benchmarks/" not in filename:
+                self._own.add(label[0])
+        return label
+
+    def _run(self):
+        own = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            wall, last = now - last, now
+            threads = {thread.ident: thread for thread in threading.enumerate()}
+            # Clocks of ended threads are dropped, their idents get reused
+            live = {(thread.ident, thread.native_id) for thread in threads.values()}
+            self._clocks = {key: state for key, state in self._clocks.items() if key in live}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or ident not in threads:
+                    continue
+                cpu = self._cpu_delta(threads[ident])
+                labels = []
+                while frame is not None:
+                    labels.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                labels.reverse()
+                # wallet_3 and ThreadPoolExecutor-0_1 are one thread kind each
+                thread = re.sub(r"[-_]?\d+", "", threads[ident].name) or "thread"
+                key = (thread, tuple(labels))
+                entry = self._stacks.get(key)
+                if entry is None:
+                    entry = self._stacks[key] = [0.0, 0.0]
+                entry[0] += wall
+                if cpu:
+                    previous = self._last_stacks.get(ident)
+                    if previous is not None and labels and labels[-1][1].endswith(BLOCKING_FILES):
+                        self._stacks[previous][1] += cpu
+                    else:
+                        entry[1] += cpu
+                self._last_stacks[ident] = key
+            self._last_stacks = {ident: key for ident, key in self._last_stacks.items()
+                                 if ident in threads}
+            self.samples += 1
+
+    def _cpu_delta(self, thread):
+        key = (thread.ident, thread.native_id)
+        state = self._clocks.get(key)
+        if state is None:
+            clock = _thread_clock(thread.ident)
+            if clock is None:
+                self.cpu_clocks = False
+                return None
+            state = self._clocks[key] = [clock, None]
+        try:
+            now = time.clock_gettime(state[0])
+        except OSError:
+            # The thread ended after it was listed
+            self._clocks.pop(key, None)
+            return None
+        delta = now - state[1] if state[1] is not None else 0.0
+        state[1] = now
+        return delta
+
+    def stacks(self):
+        """
+        Returns (thread, frame labels root first, wall seconds, CPU seconds)
+        """
+        return [(thread, tuple(label for label, _ in labels), wall, cpu)
+                for (thread, labels), (wall, cpu) in self._stacks.items()]
+
+    def write_folded(self, path, weight="cpu"):
+        """
+        Writes collapsed stacks ("thread;frame;frame microseconds"), the
+        input of flamegraph.pl, inferno and speedscope. weight is "cpu" or
+        "wall".
+        """
+        index = 1 if weight == "cpu" else 0
+        folded = {}
+        for (thread, labels), times in self._stacks.items():
+            line = ";".join([thread] + [label.replace(";", ",") for label, _ in labels])
+            folded[line] = folded.get(line, 0) + times[index]
+        with open(path, "w", encoding="utf-8") as f:
+            for line, seconds in sorted(folded.items()):
+                micros = int(seconds * 1e6)
+                if micros:
+                    f.write(f"{line} {micros}\n")
+
+    def categories(self):
+        """
+        Returns {category: [wall, CPU]} by the innermost matching frame
+        """
+        totals = {}
+        for (thread, labels), (wall, cpu) in self._stacks.items():
+            name = _category([filename for _, filename in reversed(labels)])
+            entry = totals.setdefault(name, [0.0, 0.0])
+            entry[0] += wall
+            entry[1] += cpu
+        return totals
+
+    def functions(self):
+        """
+        Returns {function: [self wall, self CPU, total wall, total CPU]}
+        """
+        totals = {}
+        for (thread, labels), (wall, cpu) in self._stacks.items():
+            if not labels:
+                continue
+            for label in set(label for label, _ in labels):
+                entry = totals.setdefault(label, [0.0, 0.0, 0.0, 0.0])
+                entry[2] += wall
+                entry[3] += cpu
+            entry = totals[labels[-1][0]]
+            entry[0] += wall
+            entry[1] += cpu
+        return totals
+
+    def report(self, top=DEFAULT_TOP):
+        """
+        Returns the summary tables as text
+        """
+        lines = [f"{self.samples} samples every {self.interval * 1000:.0f}ms"]
+        if not self.cpu_clocks:
+            lines.append("No per-thread CPU clock on this system, CPU columns are 0")
+        categories = self.categories()
+        total_cpu = sum(cpu for _, cpu in categories.values()) or 1.0
+        lines += ["", f"{'Category':<14}{'CPU s':>9}{'CPU %':>8}{'Wall s':>10}{'Waiting s':>11}"]
+        for name, (wall, cpu) in sorted(categories.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:<14}{cpu:>9.2f}{cpu / total_cpu * 100:>7.1f}%"
+                         f"{wall:>10.2f}{max(wall - cpu, 0):>11.2f}")
+        functions = self.functions()
+        own = {label: times for label, times in functions.items() if label in self._own}
+        tables = (
+            ("Top CPU (self)", functions, 1),
+            ("Top wall (self, thread-seconds)", functions, 0),
+            ("Our code by CPU (total)", own, 3),
+            ("Our code by wall (total, thread-seconds)", own, 2),
+        )
+        for title, rows, column in tables:
+            lines += ["", f"{title:<60}{'s':>9}"]
+            for label, times in sorted(rows.items(), key=lambda item: -item[1][column])[:top]:
+                if times[column] > 0:
+                    lines.append(f"{label[:60]:<60}{times[column]:>9.2f}")
+        return "\n".join(lines)
+
+class ThreadProfiler:
+    """
+    cProfile for the calling thread and every thread started while it
+    runs. Times are wall clock, so waiting shows up in the call that
+    blocked (recv_into, acquire). Threads started before start() (e.g. a
+    running receipt tracker) are not seen, and a thread started during
+    the profile stays profiled until it ends, so this mode is meant for
+    one-off runs. The stats load in snakeviz or gprof2dot.
+    """
+
+    def __init__(self):
+        self._profiles = []
+        self._lock = threading.Lock()
+        self.main = None
+
+    def _new_profile(self):
+        # One clock for all threads: calls still running in other threads
+        # are closed with the reading thread's clock
+        profile = cProfile.Profile()
+        with self._lock:
+            self._profiles.append(profile)
+        return profile
+
+    def _bootstrap(self, *args):
+        # Runs as the first profile event of a new thread
+        sys.setprofile(None)
+        self._new_profile().enable()
+
+    def start(self):
+        threading.setprofile(self._bootstrap)
+        self.main = self._new_profile()
+        self.main.enable()
+        return self
+
+    def stop(self):
+        threading.setprofile(None)
+        if self.main is not None:
+            self.main.disable()
+
+    def stats(self):
+        with self._lock:
+            profiles = [profile for profile in self._profiles if profile.getstats()]
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        return stats
+
+    def report(self, top=DEFAULT_TOP):
+        text = io.StringIO()
+        stats = self.stats()
+        stats.stream = text
+        stats.sort_stats("tottime").print_stats(top)
+        stats.sort_stats("cumulative").print_stats(top)
+        return text.getvalue()
+
+_active = None
+_active_lock = threading.Lock()
+
+@contextmanager
+def profiled(prefix, mode="sample", interval=DEFAULT_INTERVAL, top=DEFAULT_TOP):
+    """
+    Profiles the block and writes the results next to prefix:
+
+        sample:   prefix.cpu.folded, prefix.wall.folded and prefix.txt
+        cprofile: prefix.pstats and prefix.txt
+
+    Nested blocks run inside the outer profile, so a whole run of rounds
+    can be profiled as one.
+    """
+    global _active
+    with _active_lock:
+        if _active is not None:
+            owner = False
+        else:
+            owner = True
+            _active = SamplingProfiler(interval) if mode == "sample" else ThreadProfiler()
+        profiler = _active
+    if not owner:
+        yield profiler
+        return
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        with _active_lock:
+            _active = None
+        report = profiler.report(top)
+        if mode == "sample":
+            profiler.write_folded(prefix + ".cpu.folded", "cpu")
+            profiler.write_folded(prefix + ".wall.folded", "wall")
+        else:
+            profiler.stats().dump_stats(prefix + ".pstats")
+        with open(prefix + ".txt", "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+        print(report)
+        print(f"Profile written to {prefix}.*")
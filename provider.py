@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from web3.providers.base import JSONBaseProvider
+
+from ratelimit import method_priority
+
+class ClientProvider(JSONBaseProvider):
+    """
+    Web3 provider that sends every request through an RpcClient or RpcPool
+    """
+
+    def __init__(self, client, **kwargs):
+        super().__init__(**kwargs)
+        self.client = client
+
+    def __str__(self):
+        return f"RPC connection {self.client.endpoint}"
+
+    def make_request(self, method, params):
+        payload = self.encode_rpc_request(method, params)
+        return self.client.post(payload, method_priority(method), method)
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import email.utils
+import heapq
+import itertools
+import random
+import threading
+import time
+
+# Token bucket settings
+DEFAULT_RATE = 25.0  # Requests per second
+DEFAULT_BURST = 50  # Requests allowed at once after an idle period
+
+# Backoff settings
+DEFAULT_BACKOFF_BASE = 0.5  # Seconds before the first retry
+DEFAULT_BACKOFF_CAP = 30.0  # Longest wait between retries
+
+# Lower number = served first when requests wait for tokens
+PRIORITY_SEND = 0
+PRIORITY_RECEIPT = 1
+PRIORITY_DEFAULT = 2
+PRIORITY_BALANCE = 3
+
+METHOD_PRIORITIES = {
+    "eth_sendRawTransaction": PRIORITY_SEND,
+    "eth_getTransactionReceipt": PRIORITY_RECEIPT,
+    "eth_getBlockReceipts": PRIORITY_RECEIPT,
+    "eth_blockNumber": PRIORITY_RECEIPT,
+    "eth_getBalance": PRIORITY_BALANCE,
+}
+
+# HTTP answers that mean "slow down and try again"
+RETRY_STATUSES = (429, 502, 503, 504)
+
+def method_priority(method):
+    """
+    Returns the scheduling priority of a JSON-RPC method
+    """
+    return METHOD_PRIORITIES.get(method, PRIORITY_DEFAULT)
+
+def parse_retry_after(value):
+    """
+    Returns the seconds to wait from a Retry-After header, or None
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(when.timestamp() - time.time(), 0.0)
+
+def backoff_delay(attempt, base=DEFAULT_BACKOFF_BASE, cap=DEFAULT_BACKOFF_CAP):
+    """
+    Exponential backoff with jitter for the given retry attempt (0-based)
+    """
+    delay = min(cap, base * (2 ** attempt))
+    return random.uniform(delay / 2, delay)
+
+class RateLimiter:
+    """
+    Token bucket shared by every request to one endpoint. Waiting
+    requests get tokens in priority order, and the whole bucket can be
+    paused when the endpoint asks us to back off.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._waiting = []
+        self._order = itertools.count()
+        self._condition = threading.Condition()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, priority=PRIORITY_DEFAULT):
+        """
+        Blocks until a token is free for this request
+        """
+        if not self.rate:
+            return
+        with self._condition:
+            entry = (priority, next(self._order))
+            heapq.heappush(self._waiting, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._waiting[0] == entry and now >= self._paused_until and self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    if now < self._paused_until:
+                        wait = self._paused_until - now
+                    elif self._tokens < 1:
+                        wait = (1 - self._tokens) / self.rate
+                    else:
+                        wait = None  # Another request is ahead of us
+                    self._condition.wait(wait)
+            finally:
+                self._waiting.remove(entry)
+                heapq.heapify(self._waiting)
+                self._condition.notify_all()
+
+    def pause(self, seconds):
+        """
+        Stops handing out tokens for the given number of seconds
+        """
+        with self._condition:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = min(self._tokens, 0.0)
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from concurrent.futures import Future
+
+from client import RpcError
+
+# Seconds between eth_blockNumber checks
+DEFAULT_POLL_INTERVAL = 1.0
+# Blocks read with eth_getBlockReceipts after a gap, older ones are swept by hash
+MAX_CATCH_UP_BLOCKS = 16
+
+def _to_int(value):
+    if isinstance(value, str):
+        return int(value, 16)
+    return value
+
+def normalize_receipt(receipt):
+    """
+    Converts the fields the bot reads from hex strings to ints
+    """
+    receipt = dict(receipt)
+    for key in ("status", "blockNumber", "gasUsed", "effectiveGasPrice"):
+        if key in receipt and receipt[key] is not None:
+            receipt[key] = _to_int(receipt[key])
+    return receipt
+
+class ReceiptTracker:
+    """
+    Watches new blocks once for all pending transactions and resolves
+    a future per transaction hash when its receipt shows up.
+    Uses eth_getBlockReceipts when the node has it, otherwise one batched
+    eth_getTransactionReceipt request per new block.
+    """
+
+    def __init__(self, client, poll_interval=DEFAULT_POLL_INTERVAL):
+        self.client = client
+        self.poll_interval = poll_interval
+        self.block_receipts = True
+        self._pending = {}
+        self._new = set()
+        self._last_block = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def track(self, tx_hash, callback=None):
+        """
+        Returns a future that resolves to the receipt of tx_hash
+        """
+        tx_hash = tx_hash.lower()
+        with self._lock:
+            future = self._pending.get(tx_hash)
+            if future is None:
+                future = Future()
+                self._pending[tx_hash] = future
+                self._new.add(tx_hash)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="receipts", daemon=True)
+                self._thread.start()
+        if callback is not None:
+            future.add_done_callback(callback)
+        return future
+
+    def forget(self, tx_hash):
+        """
+        Stops tracking a hash (e.g. after a timeout)
+        """
+        with self._lock:
+            future = self._pending.pop(tx_hash.lower(), None)
+        if future is not None:
+            future.cancel()
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._thread = None
+                    return
+            try:
+                self._poll()
+            except Exception as e:
+                print(f"Receipt tracker error: {e}")
+            time.sleep(self.poll_interval)
+
+    def _poll(self):
+        head = _to_int(self.client.call("eth_blockNumber"))
+        if self._last_block is None:
+            # Transactions sent just before tracking started may be in the head block
+            self._last_block = head - 1
+        if head <= self._last_block:
+            return
+        first = max(self._last_block + 1, head - MAX_CATCH_UP_BLOCKS + 1)
+        with self._lock:
+            new, self._new = self._new, set()
+        scanned = head
+        try:
+            if self.block_receipts and first == self._last_block + 1:
+                try:
+                    scanned = self._scan_blocks(first, head)
+                    # Hashes added since the last poll may be in a block scanned earlier
+                    self._sweep(new)
+                except RpcError as e:
+                    message = str(e).lower()
+                    if e.code == -32601 or "method" in message or "not supported" in message:
+                        print(f"eth_getBlockReceipts not available, polling by hash: {e}")
+                        self.block_receipts = False
+                    self._sweep()
+                    scanned = head
+            else:
+                self._sweep()
+        except Exception:
+            # Swept again on the next poll, their blocks are not scanned twice
+            with self._lock:
+                self._new |= new
+            raise
+        self._last_block = scanned
+
+    def _scan_blocks(self, first, last):
+        """
+        Resolves the receipts of blocks first..last and returns the last
+        block scanned. A node that has not caught up answers null, that
+        block and the ones after it are read again on the next poll.
+        """
+        calls = [("eth_getBlockReceipts", [hex(number)]) for number in range(first, last + 1)]
+        for number, block in enumerate(self.client.batch(calls), first):
+            if isinstance(block, Exception):
+                raise block
+            if block is None:
+                return number - 1
+            for receipt in block:
+                self._resolve(receipt)
+        return last
+
+    def _sweep(self, hashes=None):
+        with self._lock:
+            if hashes is None:
+                hashes = list(self._pending)
+            else:
+                hashes = [tx_hash for tx_hash in hashes if tx_hash in self._pending]
+        if not hashes:
+            return
+        calls = [("eth_getTransactionReceipt", [tx_hash]) for tx_hash in hashes]
+        for receipt in self.client.batch(calls):
+            if receipt and not isinstance(receipt, Exception):
+                self._resolve(receipt)
+
+    def _resolve(self, receipt):
+        tx_hash = receipt.get("transactionHash", "").lower()
+        with self._lock:
+            future = self._pending.pop(tx_hash, None)
+        if future is not None and not future.done():
+            future.set_result(normalize_receipt(receipt))
+
+_trackers = {}
+_trackers_lock = threading.Lock()
+
+def get_receipt_tracker(client, poll_interval=DEFAULT_POLL_INTERVAL):
+    """
+    Returns the shared receipt tracker for a client
+    """
+    with _trackers_lock:
+        tracker = _trackers.get(client)
+        if tracker is None:
+            tracker = ReceiptTracker(client, poll_interval)
+            _trackers[client] = tracker
+        return tracker
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+from dataclasses import dataclass, field
+
+from calldata import DEFAULT_AMOUNT, DEFAULT_CHANNEL, DEFAULT_TOKEN, address_bytes, get_template
+
+@dataclass
+class Route:
+    """
+    One source chain and bridge payload: where transactions are sent
+    and what they carry
+    """
+    name: str
+    chain_id: int
+    rpc_url: str
+    contract: str
+    value: int
+    channel: int = DEFAULT_CHANNEL
+    token: str = DEFAULT_TOKEN
+    amount: int = DEFAULT_AMOUNT
+    rpc_urls: list = field(default_factory=list)
+    wallet_file: str = None
+    journal_file: str = None
+
+    @property
+    def template(self):
+        return get_template(self.channel, self.amount, self.token)
+
+    def urls(self):
+        return list(dict.fromkeys([self.rpc_url] + list(self.rpc_urls)))
+
+REQUIRED_KEYS = ("name", "chain_id", "rpc_url", "contract", "value")
+INT_KEYS = ("chain_id", "value", "channel", "amount")
+
+def parse_route(config):
+    """
+    Builds a Route from one route table entry. Raises ValueError on a
+    bad entry.
+    """
+    known = set(Route.__dataclass_fields__)
+    unknown = set(config) - known
+    if unknown:
+        raise ValueError(f"unknown keys {', '.join(sorted(unknown))}")
+    missing = [key for key in REQUIRED_KEYS if key not in config]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    config = dict(config)
+    for key in INT_KEYS:
+        if key in config:
+            value = config[key]
+            # Big Wei amounts may be written as strings, also in hex
+            if isinstance(value, str):
+                value = int(value, 0)
+            if not isinstance(value, int) or value < 0:
+                raise ValueError(f"{key} must be a non-negative integer")
+            config[key] = value
+    for key in ("contract", "token"):
+        if key in config:
+            address_bytes(config[key])
+    if isinstance(config.get("rpc_urls"), str):
+        config["rpc_urls"] = [config["rpc_urls"]]
+    return Route(**config)
+
+def load_routes(path):
+    """
+    Reads the route table: {"routes": [{...}, ...]} or a plain list.
+    Routes default to their own journal file, journal-<name>.db.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        table = json.load(f)
+    entries = table.get("routes") if isinstance(table, dict) else table
+    if not isinstance(entries, list) or not entries:
+        raise ValueError(f"{path} has no routes")
+    routes = []
+    for index, entry in enumerate(entries, 1):
+        try:
+            route = parse_route(entry)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"{path} route {index}: {e}")
+        if route.journal_file is None:
+            route.journal_file = f"journal-{route.name}.db"
+        routes.append(route)
+    names = [route.name for route in routes]
+    if len(set(names)) != len(names):
+        raise ValueError(f"{path} has duplicate route names")
+    return routes
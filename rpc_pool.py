@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+
+from client import DEFAULT_RETRIES, UNSAFE_RETRY_METHODS, BaseClient, RpcClient, not_sent
+from ratelimit import PRIORITY_DEFAULT, backoff_delay
+
+# Pool settings
+DEFAULT_BROADCAST = 3  # Endpoints that get every eth_sendRawTransaction
+DEFAULT_EJECT_AFTER = 3  # Failures in a row before an endpoint is ejected
+DEFAULT_EJECT_SECONDS = 30.0  # Time before an ejected endpoint is probed again
+LATENCY_WINDOW = 200  # Requests kept for the rolling latency and error rate
+
+def _percentile(samples, percent):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(len(ordered) * percent / 100))
+    return ordered[index]
+
+class Endpoint:
+    """
+    One RPC endpoint with rolling latency and error statistics
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.endpoint = client.endpoint
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.outcomes = deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+        self.failures_in_row = 0
+        self.ejected = False
+        self.ejected_until = 0.0  # When an ejected endpoint is due for a probe
+        self._lock = threading.Lock()
+
+    def record(self, latency, ok):
+        with self._lock:
+            self.requests += 1
+            self.outcomes.append(ok)
+            if ok:
+                self.latencies.append(latency)
+                self.failures_in_row = 0
+            else:
+                self.failures_in_row += 1
+
+    def healthy(self):
+        return not self.ejected
+
+    def due(self, now=None):
+        return self.ejected and (now or time.monotonic()) >= self.ejected_until
+
+    def p50(self):
+        with self._lock:
+            return _percentile(self.latencies, 50)
+
+    def stats(self):
+        with self._lock:
+            outcomes = list(self.outcomes)
+            latencies = list(self.latencies)
+        errors = outcomes.count(False)
+        return {
+            "endpoint": self.endpoint,
+            "requests": self.requests,
+            "p50": _percentile(latencies, 50),
+            "p99": _percentile(latencies, 99),
+            "error_rate": errors / len(outcomes) if outcomes else 0.0,
+            "healthy": self.healthy(),
+        }
+
+class RpcPool(BaseClient):
+    """
+    Several RPC endpoints used as one client. Reads go to the fastest
+    healthy endpoint and fail over to the next one. Sends are broadcast
+    to several endpoints at once. Failing endpoints are ejected and only
+    come back after a successful probe. The endpoint clients do not retry,
+    the pool spends the retry budget on the next endpoint instead.
+    """
+
+    def __init__(self, urls, broadcast=DEFAULT_BROADCAST, eject_after=DEFAULT_EJECT_AFTER,
+                 eject_seconds=DEFAULT_EJECT_SECONDS, retries=DEFAULT_RETRIES, **client_kwargs):
+        super().__init__(urls[0])
+        self.endpoints = [Endpoint(RpcClient(url, retries=0, **client_kwargs)) for url in urls]
+        self.retries = retries
+        self.broadcast = broadcast
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max(len(urls), 1),
+                                            thread_name_prefix="broadcast")
+
+    def _ranked(self):
+        """
+        Healthy endpoints fastest first, ejected ones (due for a probe first) after
+        """
+        healthy = [e for e in self.endpoints if e.healthy()]
+        # Endpoints without samples yet are tried first so they get measured
+        healthy.sort(key=lambda e: (e.p50() is not None, e.p50() or 0.0))
+        ejected = sorted((e for e in self.endpoints if not e.healthy()),
+                         key=lambda e: e.ejected_until)
+        return healthy + ejected
+
+    def _send(self, endpoint, payload, priority, method=None):
+        start = time.monotonic()
+        try:
+            response = endpoint.client.post(payload, priority, method)
+        except (requests.RequestException, ValueError):
+            endpoint.record(time.monotonic() - start, False)
+            if endpoint.ejected:
+                # Still failing, so the next probe waits another eject period
+                endpoint.ejected_until = time.monotonic() + self.eject_seconds
+            elif endpoint.failures_in_row >= self.eject_after:
+                endpoint.ejected = True
+                endpoint.ejected_until = time.monotonic() + self.eject_seconds
+                print(f"RPC endpoint ejected for {self.eject_seconds:.0f}s: {endpoint.endpoint}")
+            raise
+        endpoint.record(time.monotonic() - start, True)
+        if endpoint.ejected:
+            # Answered again, so it is back in rotation
+            endpoint.ejected = False
+            endpoint.ejected_until = 0.0
+        return response
+
+    def post(self, payload, priority=PRIORITY_DEFAULT, method=None):
+        """
+        Routes a payload: broadcast for sends, fastest endpoint for reads.
+        Sends only fail over when the endpoint could not be reached.
+        Errors fail over to the next endpoint at once, the pool's retries
+        repeat the whole pass after a backoff.
+        """
+        if self.first_request_time is None:
+            self.first_request_time = time.perf_counter()
+        if method == "eth_sendRawTransaction" and self.broadcast > 1:
+            return self._broadcast(payload, priority, method)
+        error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(backoff_delay(attempt - 1))
+            for endpoint in self._ranked():
+                try:
+                    return self._send(endpoint, payload, priority, method)
+                except (requests.RequestException, ValueError) as e:
+                    if method in UNSAFE_RETRY_METHODS and not not_sent(e):
+                        raise
+                    error = e
+        raise error
+
+    def _broadcast(self, payload, priority, method=None):
+        ranked = self._ranked()
+        targets = [e for e in ranked if e.healthy()][:self.broadcast] or ranked[:1]
+        futures = {self._executor.submit(self._send, e, payload, priority, method)
+                   for e in targets}
+        first_error_response = None
+        error = None
+        while futures:
+            done, futures = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                except (requests.RequestException, ValueError) as e:
+                    error = e
+                    continue
+                if "error" not in response:
+                    # The rest keep running and still update their stats
+                    return response
+                if first_error_response is None:
+                    first_error_response = response
+        if first_error_response is not None:
+            return first_error_response
+        raise error
+
+    def probe(self):
+        """
+        Sends a cheap request to every ejected endpoint that is due
+        """
+        now = time.monotonic()
+        for endpoint in self.endpoints:
+            if endpoint.due(now):
+                try:
+                    self._send(endpoint, '{"jsonrpc":"2.0","method":"web3_clientVersion",'
+                                         '"params":[],"id":0}', PRIORITY_DEFAULT,
+                               "web3_clientVersion")
+                except (requests.RequestException, ValueError):
+                    pass
+
+    def stats(self):
+        """
+        Rolling p50/p99 latency, error rate and health per endpoint
+        """
+        return [endpoint.stats() for endpoint in self.endpoints]
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        for endpoint in self.endpoints:
+            endpoint.client.close()
+
+def format_stats(stats):
+    """
+    One line per endpoint for printing
+    """
+    lines = []
+    for s in stats:
+        p50 = f"{s['p50'] * 1000:.0f}ms" if s["p50"] is not None else "-"
+        p99 = f"{s['p99'] * 1000:.0f}ms" if s["p99"] is not None else "-"
+        state = "ok" if s["healthy"] else "ejected"
+        lines.append(f"{s['endpoint']}: p50 {p50}, p99 {p99}, errors {s['error_rate']:.0%}, "
+                     f"{s['requests']} requests, {state}")
+    return lines
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_pool(urls, **kwargs):
+    """
+    Returns the shared pool for a list of URLs, creating it on first use
+    """
+    key = tuple(urls)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = RpcPool(list(urls), **kwargs)
+            _pools[key] = pool
+        return pool
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+
+# Most sign() calls sent to one worker in a single round trip
+MAX_BATCH = 64
+
+# Keys loaded in each worker process, by lowercase address
+_worker_accounts = {}
+
+def _init_worker(keys):
+    # Runs once per worker, so private keys are not sent with every batch
+    from eth_account import Account
+    for address, private_key in keys.items():
+        _worker_accounts[address] = Account.from_key(private_key)
+
+class SigningError(Exception):
+    """
+    Transaction could not be signed in a worker
+    """
+
+def _sign_batch(items):
+    signed = []
+    for address, transaction, *private_key in items:
+        try:
+            if private_key:
+                # Keys the pool was not started with come with the item
+                from eth_account import Account
+                raw = Account.sign_transaction(transaction, private_key[0]).raw_transaction
+            else:
+                raw = _worker_accounts[address].sign_transaction(transaction).raw_transaction
+            signed.append(bytes(raw))
+        except Exception as e:
+            signed.append(SigningError(f"{type(e).__name__}: {e}"))
+    return signed
+
+def sign_in_process(wallet, transaction):
+    """
+    Signs a transaction on the calling thread and returns the raw bytes
+    """
+    from eth_account import Account
+    signed = Account.sign_transaction(transaction, wallet["private_key"])
+    return bytes(signed.raw_transaction)
+
+class SigningPool:
+    """
+    Signs transactions on a process pool. Every worker gets all keys
+    once at startup and then only receives unsigned transaction dicts.
+    sign() calls from many threads are batched: each worker has at most
+    one batch at a time, and calls that arrive while it is busy go to it
+    together in the next round trip.
+    """
+
+    def __init__(self, wallets, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.keys = {w["address"].lower(): w["private_key"] for w in wallets}
+        # Spawned workers are safe to start from a multi-threaded process
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.keys,),
+        )
+        self.batches = 0
+        self.signed = 0
+        self._closed = False
+        self._queue = queue.SimpleQueue()
+        self._slots = threading.Semaphore(self.workers)
+        self._dispatcher = threading.Thread(target=self._dispatch, name="signing", daemon=True)
+        self._dispatcher.start()
+
+    def sign_batch(self, items):
+        """
+        Signs (address, transaction) pairs split across the workers.
+        Returns raw signed bytes in the same order.
+        """
+        items = [(address.lower(), transaction) for address, transaction in items]
+        if not items:
+            return []
+        size = -(-len(items) // self.workers)
+        futures = [self._pool.submit(_sign_batch, items[i:i + size])
+                   for i in range(0, len(items), size)]
+        signed = []
+        for future in futures:
+            signed.extend(future.result())
+        for raw in signed:
+            if isinstance(raw, SigningError):
+                raise raw
+        return signed
+
+    def sign(self, address, transaction, private_key=None):
+        """
+        Signs one transaction on a worker and returns the raw bytes.
+        private_key is only sent along if the workers do not have it.
+        """
+        if self._closed:
+            raise RuntimeError("Signing pool is closed")
+        item = (address.lower(), transaction)
+        if private_key is not None and item[0] not in self.keys:
+            item += (private_key,)
+        future = Future()
+        self._queue.put((item, future))
+        return future.result()
+
+    def _dispatch(self):
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                return
+            # Waits for a free worker, calls queue up meanwhile
+            self._slots.acquire()
+            batch = [entry]
+            while len(batch) < MAX_BATCH:
+                try:
+                    entry = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is None:
+                    self._queue.put(None)
+                    break
+                batch.append(entry)
+            self.batches += 1
+            self.signed += len(batch)
+            try:
+                future = self._pool.submit(_sign_batch, [item for item, _ in batch])
+            except Exception as e:
+                self._slots.release()
+                for _, waiter in batch:
+                    waiter.set_exception(e)
+                continue
+            future.add_done_callback(lambda done, batch=batch: self._finish(batch, done))
+
+    def _finish(self, batch, done):
+        self._slots.release()
+        try:
+            signed = done.result()
+        except Exception as e:
+            for _, waiter in batch:
+                waiter.set_exception(e)
+            return
+        for (_, waiter), raw in zip(batch, signed):
+            if isinstance(raw, SigningError):
+                waiter.set_exception(raw)
+            else:
+                waiter.set_result(raw)
+
+    def close(self):
+        self._closed = True
+        self._queue.put(None)
+        self._pool.shutdown()
+
+_pools = {}
+_pool_lock = threading.Lock()
+
+def get_signing_pool(wallets, workers=None, name=None):
+    """
+    Returns the shared signing pool for name (e.g. a route), restarting
+    it when keys or size change
+    """
+    with _pool_lock:
+        keys = {w["address"].lower(): w["private_key"] for w in wallets}
+        wanted = workers or os.cpu_count() or 1
+        pool = _pools.get(name)
+        if pool is not None and (pool.keys != keys or pool.workers != wanted):
+            pool.close()
+            pool = None
+        if pool is None:
+            pool = SigningPool(wallets, wanted)
+            _pools[name] = pool
+        return pool
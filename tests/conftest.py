@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from mock_chain import serve_many
+
+@pytest.fixture
+def mock_chain():
+    """
+    Starts one mock chain on count ports: start(count) -> (chain, servers, urls).
+    Everything is stopped after the test.
+    """
+    started = []
+
+    def start(count=1, block_time=0.1):
+        chain, servers = serve_many(count, block_time=block_time)
+        started.append((chain, servers))
+        return chain, servers, [f"http://127.0.0.1:{server.server_port}" for server in servers]
+
+    yield start
+    for chain, servers in started:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+        chain.close()
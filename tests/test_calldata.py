@@ -0,0 +1,60 @@
+import json
+import os
+
+import pytest
+
+from calldata import (AMOUNT, CHANNEL, DEFAULT_CHANNEL, TOKEN, TRANSFER_TEMPLATE, TRANSFER_WORDS,
+                      address_bytes, get_template)
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "transfer_calldata.json")
+
+# Calldata built by the original hex string concatenation in transfer.py
+with open(FIXTURE) as f:
+    EXPECTED = json.load(f)
+
+DEADLINE = EXPECTED["deadline"]
+CHECKSUMMED, LOWERCASE = EXPECTED["calldata"]
+
+def words(calldata):
+    return [calldata[offset:offset + 32] for offset in range(4, len(calldata), 32)]
+
+def changed_words(a, b):
+    return [index for index, (x, y) in enumerate(zip(words(a), words(b))) if x != y]
+
+def slots(kind):
+    return [index for index, word in enumerate(TRANSFER_WORDS) if word is kind]
+
+@pytest.mark.parametrize("address", [CHECKSUMMED, LOWERCASE])
+def test_template_matches_the_original_calldata(address):
+    expected = bytes.fromhex(EXPECTED["calldata"][address][2:])
+    assert TRANSFER_TEMPLATE.build(address, DEADLINE) == expected
+
+def test_fixture_covers_both_address_forms():
+    assert CHECKSUMMED != CHECKSUMMED.lower()
+    assert LOWERCASE == LOWERCASE.lower()
+
+@pytest.mark.parametrize("address", [
+    CHECKSUMMED[:3] + CHECKSUMMED[3].swapcase() + CHECKSUMMED[4:],  # Checksum mismatch
+    CHECKSUMMED[:-2],  # Too short
+    CHECKSUMMED + "00",  # Too long
+    "0x" + "zz" * 20,  # Not hex
+    CHECKSUMMED[2:] + "00",  # No 0x prefix
+])
+def test_invalid_address_is_rejected(address):
+    with pytest.raises(ValueError):
+        TRANSFER_TEMPLATE.build(address, DEADLINE)
+
+def test_default_route_shares_the_template():
+    assert get_template() is TRANSFER_TEMPLATE
+
+@pytest.mark.parametrize("kwargs, kind, value", [
+    ({"channel": DEFAULT_CHANNEL + 5}, CHANNEL, (DEFAULT_CHANNEL + 5).to_bytes(32, "big")),
+    ({"amount": 12345}, AMOUNT, (12345).to_bytes(32, "big")),
+    ({"token": "0x" + "42" * 20}, TOKEN, address_bytes("0x" + "42" * 20) + bytes(12)),
+])
+def test_route_patches_only_its_words(kwargs, kind, value):
+    default = TRANSFER_TEMPLATE.build(CHECKSUMMED, DEADLINE)
+    routed = get_template(**kwargs).build(CHECKSUMMED, DEADLINE)
+    assert len(routed) == len(default)
+    assert changed_words(default, routed) == slots(kind)
+    assert all(words(routed)[index] == value for index in slots(kind))
@@ -0,0 +1,85 @@
+import json
+import os
+
+from client import RpcClient
+from fees import MIN_PRIORITY_FEE, FeeOracle, bump_fees, fees_from_history
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+def load_history():
+    # eth_feeHistory(10 blocks, "latest", [50]) answer, one block has
+    # no transactions and pays 0
+    with open(os.path.join(FIXTURES, "fee_history.json"), "r", encoding="utf-8") as f:
+        return json.load(f)["result"]
+
+def test_fees_from_recorded_history():
+    quote = fees_from_history(load_history())
+    # Median of the 8 non-zero rewards
+    assert quote.max_priority_fee_per_gas == 10 ** 9
+    # Last baseFeePerGas entry is the next block's base fee
+    assert quote.base_fee_per_gas == 19531250
+    assert quote.max_fee_per_gas == 2 * 19531250 + 10 ** 9
+    # 11 base fees from block 0x2a3f1c, the newest block is 9 later
+    assert quote.block_number == 0x2a3f1c + 9
+
+def test_base_fee_multiplier():
+    quote = fees_from_history(load_history(), base_fee_multiplier=3)
+    assert quote.max_fee_per_gas == 3 * 19531250 + 10 ** 9
+
+def test_empty_reward_list_uses_minimum_priority_fee():
+    history = load_history()
+    history["reward"] = []
+    quote = fees_from_history(history)
+    assert quote.max_priority_fee_per_gas == MIN_PRIORITY_FEE
+    assert quote.max_fee_per_gas == 2 * 19531250 + MIN_PRIORITY_FEE
+    assert quote.block_number == 0x2a3f1c + 9
+
+def test_missing_reward_uses_minimum_priority_fee():
+    history = load_history()
+    del history["reward"]
+    assert fees_from_history(history).max_priority_fee_per_gas == MIN_PRIORITY_FEE
+
+def test_zero_rewards_use_minimum_priority_fee():
+    history = load_history()
+    history["reward"] = [["0x0"] for _ in history["reward"]]
+    quote = fees_from_history(history)
+    assert quote.max_priority_fee_per_gas == MIN_PRIORITY_FEE
+
+def test_tiny_rewards_are_raised_to_minimum():
+    history = load_history()
+    history["reward"] = [["0x1"], [], ["0x2"]]
+    assert fees_from_history(history).max_priority_fee_per_gas == MIN_PRIORITY_FEE
+
+def test_integer_fields_are_accepted():
+    # web3 middlewares hand over ints instead of hex strings
+    history = load_history()
+    history = {
+        "oldestBlock": int(history["oldestBlock"], 16),
+        "baseFeePerGas": [int(fee, 16) for fee in history["baseFeePerGas"]],
+        "reward": [[int(fee, 16) for fee in block] for block in history["reward"]],
+    }
+    quote = fees_from_history(history)
+    assert quote.max_priority_fee_per_gas == 10 ** 9
+    assert quote.block_number == 0x2a3f1c + 9
+
+def test_bump_fees_keeps_priority_below_max_fee():
+    transaction = {"maxFeePerGas": 100, "maxPriorityFeePerGas": 90}
+    quote = fees_from_history(load_history())
+    bumped = bump_fees(transaction, 1.2, quote)
+    assert bumped["maxFeePerGas"] == quote.max_fee_per_gas
+    assert bumped["maxPriorityFeePerGas"] == quote.max_priority_fee_per_gas
+    assert transaction == {"maxFeePerGas": 100, "maxPriorityFeePerGas": 90}
+
+def test_oracle_reuses_quote_within_ttl(mock_chain):
+    chain, servers, urls = mock_chain(1, block_time=60)
+    client = RpcClient(urls[0], rate=0)
+    try:
+        oracle = FeeOracle(client, ttl_blocks=2)
+        head = int(client.call("eth_blockNumber"), 16)
+        first = oracle.quote(head)
+        assert oracle.quote(head + 1) is first
+        assert chain.calls["eth_feeHistory"] == 1
+        oracle.quote(head + 2)
+        assert chain.calls["eth_feeHistory"] == 2
+    finally:
+        client.close()
@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+import headless
+
+def load(tmp_path, config, *argv):
+    path = tmp_path / "bot.json"
+    path.write_text(json.dumps(config), encoding="utf-8")
+    return headless.load_settings(headless.parse_args(["--config", str(path), *argv]))
+
+def test_config_values_are_merged_under_arguments(tmp_path):
+    settings = load(tmp_path, {"count": 5, "interval": 2, "rate": 30, "preflight": False,
+                               "rpc_urls": ["http://a", "http://b"]}, "--count", "7")
+    assert settings["count"] == 7
+    assert settings["interval"] == 2
+    assert settings["rate"] == 30
+    assert settings["preflight"] is False
+    assert settings["rpc_urls"] == ["http://a", "http://b"]
+
+def test_optional_values_may_be_null(tmp_path):
+    settings = load(tmp_path, {"rate": None, "metrics_file": None, "profile": None})
+    assert settings["rate"] is None
+
+@pytest.mark.parametrize("config, message", [
+    ({"count": "5"}, "count must be an integer"),
+    ({"count": 2.5}, "count must be an integer"),
+    ({"count": True}, "count must be an integer"),
+    ({"count": None}, "count must be an integer"),
+    ({"interval": "30"}, "interval must be a number"),
+    ({"workers": "8"}, "workers must be an integer"),
+    ({"preflight": "no"}, "preflight must be true or false"),
+    ({"rpc_url": 8545}, "rpc_url must be a string"),
+    ({"rpc_urls": "http://a"}, "rpc_urls must be a list of strings"),
+    ({"rpc_urls": ["http://a", 1]}, "rpc_urls must be a list of strings"),
+    ({"profile_mode": "perf"}, "profile_mode must be one of sample, cprofile"),
+    ({"colour": "blue"}, "Unknown settings"),
+])
+def test_invalid_config_values_are_rejected(tmp_path, config, message):
+    with pytest.raises(ValueError, match=message):
+        load(tmp_path, config)
+
+def test_invalid_config_exits_with_config_code(tmp_path, capsys):
+    path = tmp_path / "bot.json"
+    path.write_text(json.dumps({"count": "5"}), encoding="utf-8")
+    assert headless.run(["--config", str(path)]) == headless.EXIT_CONFIG
+    assert "count must be an integer" in capsys.readouterr().out
+
+def test_config_must_be_an_object(tmp_path):
+    with pytest.raises(ValueError, match="JSON object"):
+        load(tmp_path, ["count"])
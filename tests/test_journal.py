@@ -0,0 +1,80 @@
+import sqlite3
+
+import pytest
+from eth_account import Account
+
+import transfer
+from client import RpcClient
+from journal import CONFIRMED, DROPPED, SENT, Journal, reconcile
+from mock_chain import CHAIN_ID
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = Journal(str(tmp_path / "journal.db"))
+    yield journal
+    journal.close()
+
+@pytest.fixture
+def chain(mock_chain):
+    chain, servers, urls = mock_chain(1, block_time=60)
+    client = RpcClient(urls[0], rate=0, retries=0)
+    yield chain, servers[0], client
+    client.close()
+
+def events(journal):
+    # Read through a second connection, like a new process after a crash
+    with sqlite3.connect(journal.path) as db:
+        return db.execute("SELECT tx_hash, status FROM events ORDER BY id").fetchall()
+
+def make_transaction(nonce=0):
+    return {"to": "0x" + "55" * 20, "value": 0, "gas": 21000, "nonce": nonce,
+            "maxFeePerGas": 2 * 10 ** 9, "maxPriorityFeePerGas": 10 ** 8,
+            "chainId": CHAIN_ID, "data": "0x"}
+
+def test_record_now_is_on_disk_before_it_returns(journal):
+    journal.record_now("0xABC", 3, "0xDEF", SENT, {"nonce": 3, "maxFeePerGas": 5, "data": b"\x01"})
+    assert events(journal) == [("0xdef", SENT)]
+    entry, = journal.unfinished()
+    assert entry["transaction"] == {"nonce": 3, "maxFeePerGas": 5, "data": "0x01"}
+
+def test_sent_is_journaled_before_the_broadcast(journal, chain, monkeypatch):
+    chain, server, client = chain
+    account = Account.create()
+    wallet = {"address": account.address, "private_key": account.key.hex()}
+    seen = []
+    send = client.w3.eth.send_raw_transaction
+
+    def send_raw_transaction(raw):
+        seen.extend(events(journal))
+        return send(raw)
+
+    monkeypatch.setattr(client.w3.eth, "send_raw_transaction", send_raw_transaction)
+    tx_hash = transfer.send_transaction(client.w3, wallet, make_transaction(), journal=journal)
+    assert seen == [(tx_hash, SENT)]
+    assert [tx[0] for tx in chain.mempool] == [tx_hash]
+
+def test_failed_broadcast_is_journaled_as_dropped(journal, chain):
+    chain, server, client = chain
+    server.error_rate = 1.0
+    account = Account.create()
+    wallet = {"address": account.address, "private_key": account.key.hex()}
+    assert transfer.send_transaction(client.w3, wallet, make_transaction(), journal=journal) is None
+    journal.flush()
+    (sent_hash, first), (dropped_hash, second) = events(journal)
+    assert (first, second) == (SENT, DROPPED)
+    assert sent_hash == dropped_hash
+    assert journal.unfinished() == []
+
+def test_reconcile_settles_mined_and_keeps_unsent(journal, chain):
+    chain, server, client = chain
+    account = Account.create()
+    wallet = {"address": account.address, "private_key": account.key.hex()}
+    mined = transfer.send_transaction(client.w3, wallet, make_transaction(0), journal=journal)
+    chain.mine()
+    # Journaled, then the process died before the broadcast
+    journal.record_now(account.address, 1, "0x" + "ab" * 32, SENT, make_transaction(1))
+
+    pending = reconcile(client, journal)
+    assert [entry["nonce"] for entry in pending] == [1]
+    journal.flush()
+    assert (mined, CONFIRMED) in events(journal)
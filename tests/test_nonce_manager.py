@@ -0,0 +1,134 @@
+import pytest
+from eth_account import Account
+
+from client import RpcClient
+from mock_chain import CHAIN_ID
+from nonce_manager import (NonceManager, forget_nonce_manager, get_nonce_manager,
+                           is_nonce_error)
+
+@pytest.fixture
+def chain(mock_chain):
+    # Slow blocks, so nothing is mined while a test runs
+    chain, servers, urls = mock_chain(1, block_time=60)
+    client = RpcClient(urls[0], rate=0)
+    yield chain, client.w3
+    client.close()
+
+def send(w3, account, nonce, fee=2 * 10 ** 9):
+    transaction = {
+        "to": "0x" + "22" * 20, "value": 0, "gas": 21000, "nonce": nonce,
+        "maxFeePerGas": fee, "maxPriorityFeePerGas": fee // 2,
+        "chainId": CHAIN_ID, "data": "0x",
+    }
+    raw = account.sign_transaction(transaction).raw_transaction
+    return w3.eth.send_raw_transaction(raw)
+
+def test_nonces_are_handed_out_in_order_up_to_the_limit(chain):
+    chain, w3 = chain
+    account = Account.create()
+    send(w3, account, 0)
+    send(w3, account, 1)
+    manager = NonceManager(w3, account.address, max_in_flight=3)
+    assert manager.available() == 3
+    assert [manager.next_nonce() for _ in range(3)] == [2, 3, 4]
+    assert manager.available() == 0
+    # The pending nonce is only fetched once
+    assert chain.calls["eth_getTransactionCount"] == 1
+
+    manager.confirm(3)
+    assert manager.available() == 1
+    assert manager.next_nonce() == 5
+    assert manager.in_flight == {2, 4, 5}
+
+def test_release_reuses_the_last_nonce(chain):
+    chain, w3 = chain
+    manager = NonceManager(w3, Account.create().address)
+    assert manager.next_nonce() == 0
+    assert manager.next_nonce() == 1
+    manager.release(1, ValueError("insufficient funds for gas * price + value"))
+    assert manager.in_flight == {0}
+    assert manager.next_nonce() == 1
+    assert chain.calls["eth_getTransactionCount"] == 1
+
+def test_release_with_later_nonces_resyncs(chain):
+    chain, w3 = chain
+    account = Account.create()
+    manager = NonceManager(w3, account.address)
+    send(w3, account, manager.next_nonce())
+    assert manager.next_nonce() == 1
+    assert manager.next_nonce() == 2
+    # 1 failed while 2 was already handed out, the node still wants 1
+    manager.release(1, ValueError("insufficient funds for gas * price + value"))
+    assert chain.calls["eth_getTransactionCount"] == 2
+    assert manager.next_nonce() == 1
+
+def test_nonce_too_low_resyncs(chain):
+    chain, w3 = chain
+    account = Account.create()
+    manager = NonceManager(w3, account.address)
+    assert manager.next_nonce() == 0
+    # Another sender used the wallet meanwhile
+    send(w3, account, 0)
+    send(w3, account, 1)
+    chain.mine()
+    with pytest.raises(Exception) as error:
+        send(w3, account, 0, fee=10 ** 9)
+    assert "nonce too low" in str(error.value)
+    manager.release(0, error.value)
+    assert manager.in_flight == set()
+    assert manager.next_nonce() == 2
+
+def test_replacement_underpriced_resyncs(chain):
+    chain, w3 = chain
+    account = Account.create()
+    manager = NonceManager(w3, account.address)
+    assert manager.next_nonce() == 0
+    # Another sender's transaction holds nonce 0 in the mempool
+    send(w3, account, 0, fee=5 * 10 ** 9)
+    with pytest.raises(Exception) as error:
+        send(w3, account, 0)
+    assert "underpriced" in str(error.value)
+    assert is_nonce_error(error.value)
+    manager.release(0, error.value)
+    assert manager.next_nonce() == 1
+
+def test_dropped_transaction_resyncs(chain):
+    chain, w3 = chain
+    account = Account.create()
+    manager = NonceManager(w3, account.address)
+    for _ in range(3):
+        send(w3, account, manager.next_nonce())
+    # The node evicts nonces 1 and 2, neither gets a receipt
+    chain.evict(account.address, 1)
+    manager.dropped(2)
+    manager.dropped(1)
+    assert manager.in_flight == set()
+    assert manager.next_nonce() == 1
+    assert manager.next_nonce() == 2
+
+def test_seed_only_moves_forward(chain):
+    chain, w3 = chain
+    manager = NonceManager(w3, Account.create().address)
+    manager.seed(5)
+    assert manager.next_nonce() == 5
+    manager.seed(3)
+    assert manager.next_nonce() == 6
+    manager.seed(8)
+    assert manager.in_flight == set()
+    assert manager.next_nonce() == 8
+    assert "eth_getTransactionCount" not in chain.calls
+
+def test_managers_are_shared_per_chain_and_forgotten_when_idle(chain):
+    chain, w3 = chain
+    address = Account.create().address
+    manager = get_nonce_manager(w3, address, 2, chain_id=CHAIN_ID)
+    assert get_nonce_manager(w3, address.lower(), 2, chain_id=CHAIN_ID) is manager
+    assert get_nonce_manager(w3, address, 2, chain_id=1) is not manager
+
+    nonce = manager.next_nonce()
+    forget_nonce_manager(address, CHAIN_ID)
+    assert get_nonce_manager(w3, address, 2, chain_id=CHAIN_ID) is manager
+    manager.confirm(nonce)
+    forget_nonce_manager(address, CHAIN_ID)
+    assert get_nonce_manager(w3, address, 2, chain_id=CHAIN_ID) is not manager
+    forget_nonce_manager(address, 1)
@@ -0,0 +1,83 @@
+import threading
+
+import pytest
+
+import pacing
+from pacing import Pacer, SendPacer
+
+class FakeClock:
+    """
+    Monotonic clock that only moves when someone sleeps
+    """
+
+    def __init__(self):
+        self.now = 100.0
+        self.lock = threading.Lock()
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        with self.lock:
+            self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(pacing, "time", clock)
+    return clock
+
+def send_times(pacer, clock, addresses):
+    times = []
+    for address in addresses:
+        pacer.wait(address)
+        times.append(round(clock.now - 100.0, 6))
+    return times
+
+def test_rate_spaces_sends_of_all_wallets(clock):
+    pacer = SendPacer(rate=120)
+    assert send_times(pacer, clock, ["a", "b", "c", "a"]) == [0.0, 0.5, 1.0, 1.5]
+
+def test_wallet_rate_spaces_each_wallet(clock):
+    pacer = SendPacer(wallet_rate=30)
+    assert send_times(pacer, clock, ["a", "b", "a", "B"]) == [0.0, 0.0, 2.0, 2.0]
+
+def test_slowest_limit_wins(clock):
+    pacer = SendPacer(rate=60, wallet_rate=20)
+    assert send_times(pacer, clock, ["a", "b", "a"]) == [0.0, 1.0, 3.0]
+
+def test_idle_time_is_not_made_up_with_a_burst(clock):
+    pacer = SendPacer(rate=60)
+    pacer.wait("a")
+    clock.now += 10
+    assert send_times(pacer, clock, ["a", "b"]) == [10.0, 11.0]
+
+def test_no_limits_never_wait(clock):
+    pacer = SendPacer()
+    assert send_times(pacer, clock, ["a"] * 5) == [0.0] * 5
+
+def test_threads_get_separate_slots():
+    pacer = SendPacer(rate=6000)
+    times = []
+    def send():
+        pacer.wait("0xabc")
+        times.append(pacing.time.monotonic())
+    threads = [threading.Thread(target=send) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    times.sort()
+    # 10ms apart, minus scheduling slack
+    assert times[-1] - times[0] >= 0.035
+
+def test_run_schedule_keeps_interval_and_deadline(clock):
+    pacer = Pacer(10.0, deadline=25.0)
+    delays = []
+    while True:
+        delay = pacer.next_delay()
+        if delay is None:
+            break
+        delays.append(delay)
+        pacer.wait()
+    assert delays == [0.0, 10.0, 10.0]
@@ -0,0 +1,69 @@
+from client import RpcError
+from prefetch import RoundSnapshot
+from preflight import preflight, required_balance
+
+GAS_LIMIT = 100000
+MAX_FEE = 10 ** 9
+VALUE = 0
+
+def wallet(index):
+    return {"address": "0x" + f"{index:02x}" * 20, "private_key": "0x" + "11" * 32}
+
+class FakeClient:
+    """
+    Answers every eth_call in a batch with the result set for its wallet
+    """
+
+    def __init__(self, results):
+        self.results = results
+        self.calls = []
+
+    def batch(self, calls, batch_size=None):
+        self.calls.append(calls)
+        return [self.results.get(params[0]["from"], "0x") for _, params in calls]
+
+def build_call(wallet):
+    return {"from": wallet["address"], "to": "0x" + "33" * 20, "data": "0x"}
+
+def snapshot_with(balances):
+    return RoundSnapshot(balances={address.lower(): balance for address, balance in balances.items()})
+
+def test_balance_threshold_counts_every_transaction_of_a_wallet():
+    rich, poor = wallet(1), wallet(2)
+    per_tx = required_balance(1, VALUE, GAS_LIMIT, MAX_FEE)
+    snapshot = snapshot_with({rich["address"]: 3 * per_tx, poor["address"]: 3 * per_tx - 1})
+    counts = {rich["address"]: 3, poor["address"]: 3}
+    ready, skipped = preflight(None, [rich, poor], snapshot, VALUE, GAS_LIMIT, MAX_FEE,
+                               counts=counts)
+    assert ready == [rich]
+    assert list(skipped) == [poor["address"]]
+    assert "insufficient balance" in skipped[poor["address"]]
+
+def test_unknown_balance_is_not_skipped():
+    ready, skipped = preflight(None, [wallet(1)], RoundSnapshot(), VALUE, GAS_LIMIT, MAX_FEE)
+    assert ready == [wallet(1)]
+    assert skipped == {}
+
+def test_reverted_simulation_is_skipped():
+    ok, reverts, custom = wallet(1), wallet(2), wallet(3)
+    client = FakeClient({
+        reverts["address"]: RpcError({"code": 3, "message": "execution reverted: closed"}),
+        custom["address"]: RpcError({"code": -32000, "message": "execution reverted"}),
+    })
+    ready, skipped = preflight(client, [ok, reverts, custom], RoundSnapshot(), VALUE, GAS_LIMIT,
+                               MAX_FEE, build_call=build_call)
+    assert ready == [ok]
+    assert set(skipped) == {reverts["address"], custom["address"]}
+    assert skipped[reverts["address"]].startswith("simulation reverted")
+
+def test_rpc_errors_that_are_not_reverts_skip_nobody():
+    wallets = [wallet(1), wallet(2), wallet(3)]
+    client = FakeClient({
+        wallets[0]["address"]: RpcError({"code": -32005, "message": "rate limit exceeded"}),
+        wallets[1]["address"]: RpcError({"code": -32601, "message": "method not found"}),
+        wallets[2]["address"]: RpcError("No response for eth_call"),
+    })
+    ready, skipped = preflight(client, wallets, RoundSnapshot(), VALUE, GAS_LIMIT, MAX_FEE,
+                               build_call=build_call)
+    assert ready == wallets
+    assert skipped == {}
@@ -0,0 +1,107 @@
+from concurrent.futures import Future
+
+import pytest
+import requests
+from eth_account import Account
+
+from client import RpcClient
+from mock_chain import CHAIN_ID
+from receipts import ReceiptTracker
+
+def send(client, account, nonce=0):
+    transaction = {
+        "to": "0x" + "33" * 20, "value": 0, "gas": 21000, "nonce": nonce,
+        "maxFeePerGas": 2 * 10 ** 9, "maxPriorityFeePerGas": 10 ** 8,
+        "chainId": CHAIN_ID, "data": "0x",
+    }
+    raw = account.sign_transaction(transaction).raw_transaction
+    return client.call("eth_sendRawTransaction", ["0x" + bytes(raw).hex()])
+
+def pending(tracker, tx_hash):
+    # Registers a hash the way track() does, without starting the thread
+    future = Future()
+    tracker._pending[tx_hash] = future
+    tracker._new.add(tx_hash)
+    return future
+
+@pytest.fixture
+def chain(mock_chain):
+    chain, servers, urls = mock_chain(1, block_time=60)
+    client = RpcClient(urls[0], rate=0, retries=0)
+    yield chain, servers[0], client
+    client.close()
+
+def test_block_scan_resolves_receipts(chain):
+    chain, server, client = chain
+    tracker = ReceiptTracker(client)
+    tracker._poll()
+    future = pending(tracker, send(client, Account.create()))
+    chain.mine()
+    tracker._poll()
+    assert future.result(timeout=0)["status"] == 1
+
+def test_hash_added_after_its_block_was_scanned_is_swept(chain):
+    chain, server, client = chain
+    tracker = ReceiptTracker(client)
+    tx_hash = send(client, Account.create())
+    chain.mine()
+    tracker._poll()
+    # Tracking starts after the block with the receipt was scanned
+    future = pending(tracker, tx_hash)
+    chain.mine()
+    tracker._poll()
+    assert future.result(timeout=0)["blockNumber"] == chain.block - 1
+
+def test_block_answered_null_is_scanned_again(chain):
+    chain, server, client = chain
+    tracker = ReceiptTracker(client)
+    tracker._poll()
+    tx_hash = send(client, Account.create())
+    # Tracked since an earlier poll, so only the block scan can find it
+    future = Future()
+    tracker._pending[tx_hash] = future
+    chain.null_blocks.add(chain.block + 1)
+    chain.mine()
+    tracker._poll()
+    assert not future.done()
+    assert tracker._last_block == chain.block - 1
+    tracker._poll()
+    assert future.result(timeout=0)["blockNumber"] == chain.block
+
+class FlakyClient:
+    """
+    Client whose batches fail while fail is set, single calls still work
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.fail = False
+
+    def call(self, method, params=None):
+        return self.client.call(method, params)
+
+    def batch(self, calls):
+        if self.fail:
+            raise requests.ConnectionError("connection reset")
+        return self.client.batch(calls)
+
+def test_failed_poll_keeps_new_hashes(chain):
+    chain, server, client = chain
+    flaky = FlakyClient(client)
+    tracker = ReceiptTracker(flaky)
+    tx_hash = send(client, Account.create())
+    chain.mine()
+    tracker._poll()
+    future = pending(tracker, tx_hash)
+    chain.mine()
+
+    flaky.fail = True
+    with pytest.raises(requests.ConnectionError):
+        tracker._poll()
+    assert tx_hash in tracker._new
+    assert not future.done()
+
+    flaky.fail = False
+    tracker._poll()
+    assert future.result(timeout=0)["status"] == 1
+    assert not tracker._new
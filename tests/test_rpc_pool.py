@@ -0,0 +1,199 @@
+import time
+
+import pytest
+import requests
+from eth_account import Account
+from eth_utils import keccak
+
+from client import RpcError
+from mock_chain import CHAIN_ID
+from rpc_pool import RpcPool, format_stats
+
+def make_pool(urls, **kwargs):
+    # No retries or rate limit, so every failure reaches the pool at once
+    kwargs.setdefault("retries", 0)
+    kwargs.setdefault("rate", 0)
+    return RpcPool(urls, **kwargs)
+
+def signed_transaction(nonce=0):
+    transaction = {
+        "to": "0x" + "11" * 20, "value": 0, "gas": 21000, "nonce": nonce,
+        "maxFeePerGas": 2 * 10 ** 9, "maxPriorityFeePerGas": 10 ** 8,
+        "chainId": CHAIN_ID, "data": "0x",
+    }
+    raw = Account.create().sign_transaction(transaction).raw_transaction
+    return "0x" + bytes(raw).hex(), "0x" + keccak(bytes(raw)).hex()
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+def test_reads_fail_over_to_next_endpoint(mock_chain):
+    chain, servers, urls = mock_chain(2)
+    servers[0].error_rate = 1.0
+    pool = make_pool(urls)
+    try:
+        assert pool.call("web3_clientVersion") == "mock-chain/1.0"
+        assert servers[0].http_requests == 1
+        assert servers[1].http_requests == 1
+        first, second = pool.stats()
+        assert first["error_rate"] == 1.0
+        assert second["error_rate"] == 0.0
+    finally:
+        pool.close()
+
+def test_all_endpoints_failing_raises(mock_chain):
+    chain, servers, urls = mock_chain(2)
+    for server in servers:
+        server.error_rate = 1.0
+    pool = make_pool(urls)
+    try:
+        with pytest.raises(requests.HTTPError):
+            pool.call("eth_blockNumber")
+    finally:
+        pool.close()
+
+def test_failing_endpoint_is_ejected_and_probed_back(mock_chain):
+    chain, servers, urls = mock_chain(2)
+    servers[0].error_rate = 1.0
+    pool = make_pool(urls, eject_after=2, eject_seconds=1.0)
+    try:
+        pool.call("eth_blockNumber")
+        assert pool.stats()[0]["healthy"]
+        pool.call("eth_blockNumber")
+        assert not pool.stats()[0]["healthy"]
+
+        # Ejected endpoints are skipped while others are healthy
+        before = servers[0].http_requests
+        for _ in range(5):
+            pool.call("eth_blockNumber")
+        assert servers[0].http_requests == before
+
+        # Not due yet, so probe() leaves it alone
+        pool.probe()
+        assert servers[0].http_requests == before
+
+        servers[0].error_rate = 0.0
+        time.sleep(1.05)
+        # Due for a probe, but still out of rotation until it answers one
+        for _ in range(3):
+            pool.call("eth_blockNumber")
+        assert servers[0].http_requests == before
+        assert not pool.stats()[0]["healthy"]
+        pool.probe()
+        assert servers[0].http_requests == before + 1
+        assert pool.stats()[0]["healthy"]
+    finally:
+        pool.close()
+
+def test_failed_probe_keeps_endpoint_ejected(mock_chain):
+    chain, servers, urls = mock_chain(2)
+    servers[0].error_rate = 1.0
+    pool = make_pool(urls, eject_after=1, eject_seconds=0.1)
+    try:
+        pool.call("eth_blockNumber")
+        assert not pool.stats()[0]["healthy"]
+        time.sleep(0.15)
+        pool.probe()
+        assert not pool.stats()[0]["healthy"]
+        assert "ejected" in format_stats(pool.stats())[0]
+    finally:
+        pool.close()
+
+def test_send_is_broadcast_to_every_endpoint(mock_chain):
+    chain, servers, urls = mock_chain(3)
+    raw, tx_hash = signed_transaction()
+    pool = make_pool(urls, broadcast=3)
+    try:
+        assert pool.call("eth_sendRawTransaction", [raw]) == tx_hash
+        assert wait_for(lambda: all(server.http_requests == 1 for server in servers))
+        assert wait_for(lambda: sum(e.requests for e in pool.endpoints) == 3)
+        assert chain.calls["eth_sendRawTransaction"] == 3
+        assert len(chain.mempool) + len(chain.receipts) == 1
+    finally:
+        pool.close()
+
+def test_broadcast_skips_ejected_endpoints(mock_chain):
+    chain, servers, urls = mock_chain(3)
+    servers[0].error_rate = 1.0
+    pool = make_pool(urls, broadcast=3, eject_after=1)
+    try:
+        # The first endpoint fails this read and gets ejected
+        pool.call("eth_blockNumber")
+        assert [s["healthy"] for s in pool.stats()] == [False, True, True]
+
+        raw, tx_hash = signed_transaction()
+        assert pool.call("eth_sendRawTransaction", [raw]) == tx_hash
+        assert wait_for(lambda: chain.calls.get("eth_sendRawTransaction") == 2)
+        time.sleep(0.05)
+        assert servers[0].http_requests == 1
+    finally:
+        pool.close()
+
+def test_broadcast_returns_node_error_when_every_endpoint_rejects(mock_chain):
+    chain, servers, urls = mock_chain(2)
+    raw, tx_hash = signed_transaction()
+    pool = make_pool(urls, broadcast=2)
+    try:
+        pool.call("eth_sendRawTransaction", [raw])
+        with pytest.raises(RpcError, match="already known"):
+            pool.call("eth_sendRawTransaction", [raw])
+    finally:
+        pool.close()
+
+def test_refused_endpoint_fails_over_at_once(mock_chain):
+    chain, servers, urls = mock_chain(1)
+    # Endpoint clients must not spend the pool's retries on a dead node
+    pool = make_pool(["http://127.0.0.1:1"] + urls, retries=3, eject_after=2)
+    try:
+        for _ in range(3):
+            start = time.monotonic()
+            assert pool.call("eth_blockNumber").startswith("0x")
+            assert time.monotonic() - start < 0.5
+        assert not pool.stats()[0]["healthy"]
+    finally:
+        pool.close()
+
+def test_retries_repeat_the_pass_over_all_endpoints(mock_chain):
+    chain, servers, urls = mock_chain(2)
+    for server in servers:
+        server.error_rate = 1.0
+    pool = make_pool(urls, retries=1, eject_after=10)
+    try:
+        with pytest.raises(requests.RequestException):
+            pool.call("eth_blockNumber")
+        assert [server.http_requests for server in servers] == [2, 2]
+    finally:
+        pool.close()
+
+def test_send_fails_over_when_endpoint_is_unreachable(mock_chain):
+    chain, servers, urls = mock_chain(2)
+    servers[0].shutdown()
+    servers[0].server_close()
+    raw, tx_hash = signed_transaction()
+    pool = make_pool(urls, broadcast=1)
+    try:
+        assert pool.call("eth_sendRawTransaction", [raw]) == tx_hash
+        assert chain.calls["eth_sendRawTransaction"] == 1
+    finally:
+        pool.close()
+
+def test_send_is_not_repeated_after_read_timeout(mock_chain):
+    chain, servers, urls = mock_chain(2)
+    servers[0].latency = 0.5
+    raw, tx_hash = signed_transaction()
+    pool = make_pool(urls, broadcast=1, retries=2, timeout=0.2)
+    try:
+        with pytest.raises(requests.RequestException):
+            pool.call("eth_sendRawTransaction", [raw])
+        # The slow node still took it, nobody else was asked
+        assert wait_for(lambda: chain.calls.get("eth_sendRawTransaction") == 1)
+        time.sleep(0.4)
+        assert servers[0].http_requests == 1
+        assert servers[1].http_requests == 0
+    finally:
+        pool.close()
@@ -0,0 +1,56 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from eth_account import Account
+
+from signing import SigningError, SigningPool, sign_in_process
+
+def make_transaction(nonce):
+    return {
+        "to": "0x" + "44" * 20, "value": 0, "gas": 21000, "nonce": nonce,
+        "gasPrice": 10 ** 9, "chainId": 17000, "data": "0x",
+    }
+
+@pytest.fixture(scope="module")
+def wallets():
+    accounts = [Account.create() for _ in range(4)]
+    return [{"address": a.address, "private_key": a.key.hex()} for a in accounts]
+
+@pytest.fixture
+def pool(wallets):
+    pool = SigningPool(wallets, 2)
+    yield pool
+    pool.close()
+
+def test_sign_from_many_threads_is_batched(pool, wallets):
+    items = [(wallets[i % len(wallets)], make_transaction(i)) for i in range(64)]
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        signed = list(executor.map(lambda item: pool.sign(item[0]["address"], item[1]), items))
+    for (wallet, transaction), raw in zip(items, signed):
+        assert raw == sign_in_process(wallet, transaction)
+    assert pool.signed == len(items)
+    # Calls that queued up while the workers were busy shared a round trip
+    assert pool.batches < len(items)
+
+def test_sign_with_key_the_pool_was_not_started_with(pool):
+    account = Account.create()
+    raw = pool.sign(account.address, make_transaction(0), account.key.hex())
+    assert Account.recover_transaction(raw) == account.address
+
+def test_sign_errors_reach_the_caller(pool, wallets):
+    with pytest.raises(SigningError):
+        pool.sign(Account.create().address, make_transaction(0))
+    # The pool keeps working after a failed item
+    raw = pool.sign(wallets[0]["address"], make_transaction(1))
+    assert Account.recover_transaction(raw) == wallets[0]["address"]
+
+def test_sign_batch_keeps_order(pool, wallets):
+    items = [(wallets[i % len(wallets)]["address"], make_transaction(i)) for i in range(9)]
+    signed = pool.sign_batch(items)
+    assert [Account.recover_transaction(raw) for raw in signed] == [a for a, _ in items]
+
+def test_closed_pool_refuses_work(wallets):
+    pool = SigningPool(wallets, 1)
+    pool.close()
+    with pytest.raises(RuntimeError):
+        pool.sign(wallets[0]["address"], make_transaction(0))
@@ -0,0 +1,93 @@
+from concurrent.futures import Future
+
+import pytest
+
+import transfer
+from executor import WalletResult
+from journal import CONFIRMED, DROPPED, REPLACED
+
+class FakeManager:
+    address = "0xabc"
+
+    def __init__(self):
+        self.confirmed = []
+        self.dropped_nonces = []
+
+    def confirm(self, nonce):
+        self.confirmed.append(nonce)
+
+    def dropped(self, nonce):
+        self.dropped_nonces.append(nonce)
+
+class FakeJournal:
+    def __init__(self):
+        self.events = []
+
+    def record(self, address, nonce, tx_hash, status, transaction=None):
+        self.events.append((tx_hash, status))
+
+@pytest.fixture
+def stuck(monkeypatch):
+    """
+    Neither the original nor its replacement gets a receipt while waited
+    for. receipts maps a hash to what get_receipt_status() finds later.
+    """
+    receipts = {}
+    monkeypatch.setattr(transfer, "FEE_BUMP", 1.2)
+    monkeypatch.setattr(transfer, "wait_for_transaction", lambda *args, **kwargs: None)
+    monkeypatch.setattr(transfer, "replace_transaction",
+                        lambda w3, wallet, transaction, *args: ("0xnew", dict(transaction, bumped=True)))
+    monkeypatch.setattr(transfer, "get_receipt_status", lambda w3, tx_hash: receipts.get(tx_hash))
+    return receipts
+
+def confirm(journal, manager, result):
+    return transfer.confirm_transaction(
+        None, manager, result, 7, "0xold", {"nonce": 7}, wallet={"address": "0xabc"},
+        journal=journal, max_wait=0)
+
+def test_original_mined_after_replacement_is_confirmed(stuck):
+    stuck["0xold"] = True
+    journal, manager, result = FakeJournal(), FakeManager(), WalletResult(address="0xabc")
+    assert confirm(journal, manager, result) is True
+    assert result.confirmed == ["0xold"]
+    assert result.dropped == []
+    assert manager.confirmed == [7]
+    assert manager.dropped_nonces == []
+    assert journal.events == [("0xnew", REPLACED), ("0xold", CONFIRMED)]
+
+def test_replacement_mined(stuck, monkeypatch):
+    monkeypatch.setattr(transfer, "wait_for_transaction",
+                        lambda w3, tx_hash, *args: True if tx_hash == "0xnew" else None)
+    journal, manager, result = FakeJournal(), FakeManager(), WalletResult(address="0xabc")
+    assert confirm(journal, manager, result) is True
+    assert result.confirmed == ["0xnew"]
+    assert journal.events == [("0xold", REPLACED), ("0xnew", CONFIRMED)]
+
+def test_neither_mined_is_dropped(stuck):
+    journal, manager, result = FakeJournal(), FakeManager(), WalletResult(address="0xabc")
+    assert confirm(journal, manager, result) is None
+    assert result.dropped == ["0xnew"]
+    assert manager.dropped_nonces == [7]
+    assert journal.events == [("0xold", DROPPED), ("0xnew", DROPPED)]
+
+def test_replacement_refused_because_original_was_mined(stuck, monkeypatch):
+    monkeypatch.setattr(transfer, "replace_transaction", lambda *args: None)
+    stuck["0xold"] = True
+    journal, manager, result = FakeJournal(), FakeManager(), WalletResult(address="0xabc")
+    assert confirm(journal, manager, result) is True
+    assert journal.events == [("0xold", CONFIRMED)]
+
+class FakeTracker:
+    def __init__(self, receipt):
+        self.receipt = receipt
+
+    def track(self, tx_hash):
+        future = Future()
+        future.set_result(self.receipt)
+        return future
+
+def test_wait_for_transaction_is_silent(capsys):
+    # Concurrent wallets report through WalletResult, not per transaction
+    assert transfer.wait_for_transaction(None, "0x1", 1, FakeTracker({"status": 1})) is True
+    assert transfer.wait_for_transaction(None, "0x1", 1, FakeTracker({"status": 0})) is False
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,71 @@
+import threading
+import time
+
+import pytest
+from eth_account import Account
+
+from executor import stream_wallets
+from wallets import WalletStore
+
+@pytest.fixture(scope="module")
+def accounts():
+    return [Account.create() for _ in range(4)]
+
+def write_wallets(path, accounts, order):
+    with open(path, "w", encoding="utf-8") as f:
+        for index in order:
+            account = accounts[index]
+            f.write(f"{account.address},{account.key.hex()}\n")
+
+def load(tmp_path, accounts, order):
+    path = tmp_path / "wallet.txt"
+    write_wallets(path, accounts, order)
+    store = WalletStore(str(path))
+    store.reload_if_changed()
+    return store
+
+def test_chunks_keep_file_order(tmp_path, accounts):
+    store = load(tmp_path, accounts, [0, 1, 2, 3])
+    chunks = [[wallet.address for wallet in chunk] for chunk in store.chunks(3)]
+    assert chunks == [[a.address for a in accounts[:3]], [accounts[3].address]]
+
+def test_repeated_address_is_kept_in_one_chunk(tmp_path, accounts):
+    store = load(tmp_path, accounts, [0, 1, 0, 2, 1, 3])
+    assert len(store) == 6
+    chunks = [[wallet.address for wallet in chunk] for chunk in store.chunks(2)]
+    a, b, c, d = (account.address for account in accounts)
+    assert chunks == [[a, a], [b, b], [c, d]]
+
+def test_reload_forgets_old_repeats(tmp_path, accounts):
+    store = load(tmp_path, accounts, [0, 0, 1])
+    path = tmp_path / "wallet.txt"
+    write_wallets(path, accounts, [2, 3, 1, 0])
+    store.reload_if_changed()
+    chunks = [[wallet.address for wallet in chunk] for chunk in store.chunks(1)]
+    assert chunks == [[accounts[i].address] for i in (2, 3, 1, 0)]
+
+def test_streamed_address_never_runs_on_two_threads(tmp_path, accounts):
+    store = load(tmp_path, accounts, [0, 1, 2, 3, 0, 1, 2, 3, 0])
+    running = set()
+    overlaps = []
+    order = []
+    lock = threading.Lock()
+
+    def worker(wallet):
+        from executor import WalletResult
+        with lock:
+            if wallet.address in running:
+                overlaps.append(wallet.address)
+            running.add(wallet.address)
+            order.append(wallet.address)
+        time.sleep(0.01)
+        with lock:
+            running.discard(wallet.address)
+        return WalletResult(address=wallet.address, sent=["0x1"], confirmed=["0x1"])
+
+    chunks = ((chunk, worker, []) for chunk in store.chunks(2))
+    totals = stream_wallets(chunks, max_workers=4)
+    assert overlaps == []
+    assert totals.wallets == 4
+    assert totals.sent == 9
+    assert order.count(accounts[0].address) == 3
@@ -2,45 +2,125 @@
 # -*- coding: utf-8 -*-
 
 import time
-import json
-from web3 import Web3
-from eth_account import Account
 from datetime import datetime
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from nonce_manager import forget_nonce_manager, get_nonce_manager
+from executor import WalletResult, run_wallets, stream_wallets
+from client import get_client
+from rpc_pool import format_stats, get_pool
+from prefetch import RoundSnapshot, prefetch_round
+from receipts import get_receipt_tracker
+from calldata import TRANSFER_TEMPLATE
+from signing import get_signing_pool
+from fees import bump_fees, get_fee_oracle
+from gas import get_gas_cache
+from wallets import get_wallet_store
+from preflight import preflight
+from routes import Route
+from journal import CONFIRMED, DROPPED, FAILED, REPLACED, SENT, get_journal, reconcile
+from profiling import profiled
+from metrics import (IN_FLIGHT, REGISTRY, TRACER, Stage, Trace, count_error, serve_metrics,
+                     stage_summary)
 
 # Ethereum RPC URL (Infura, Alchemy, etc.)
 RPC_URL = "https://ethereum-holesky-rpc.publicnode.com"  # Add your own API key
 # For testnet: "https://sepolia.infura.io/v3/YOUR_API_KEY"
 
+# More endpoints for the same chain. With any set, reads go to the fastest
+# healthy endpoint and sends are broadcast to RPC_BROADCAST of them.
+RPC_URLS = []
+RPC_BROADCAST = 3
+
+# Wallet file (address,private_key per line)
+WALLET_FILE = "wallet.txt"
+
+# Connection pool settings
+RPC_POOL_SIZE = 32  # Keep-alive connections to the RPC node
+RPC_TIMEOUT = 30  # Seconds per request
+RPC_RETRIES = 3  # Retries on connection errors, timeouts and throttling
+RPC_RATE = 25  # Requests per second allowed by the provider, 0 for no limit
+RPC_BURST = 50  # Requests allowed at once after an idle period
+BATCH_SIZE = 100  # Requests per JSON-RPC batch when prefetching a round
+RECEIPT_POLL_INTERVAL = 1.0  # Seconds between new block checks
+
 # Contract address
 CONTRACT_ADDRESS = "0x5FbE74A283f7954f10AA04C2eDf55578811aeb03"
+TX_VALUE = 10913304046004750  # Value sent with each transaction, in Wei
+CHAIN_ID = 17000  # Holesky, for Sepolia use 11155111
+
+# Pre-flight settings (before anything is signed)
+PREFLIGHT = True  # Skip wallets whose balance cannot cover value + max fee * gas
+SIMULATE = False  # Also eth_call every wallet's transaction and skip the ones that revert
 
 # Gas settings
-GAS_LIMIT = 500000
-GAS_PRICE = None  # Auto-calculate if None
+GAS_LIMIT = 500000  # Used when gas estimation is off or fails
+ESTIMATE_GAS = True  # Estimate once per calldata shape and cache the result
+GAS_MARGIN = 1.2  # Gas limit = estimate * margin
+GAS_CACHE_BLOCKS = 100  # Re-estimate after this many blocks
+GAS_PRICE = None  # Auto-calculate if None, setting it forces legacy transactions
+USE_EIP1559 = True  # Send type-2 transactions with fees from eth_feeHistory
+FEE_HISTORY_BLOCKS = 10  # Blocks of fee history to read
+FEE_PERCENTILE = 50  # Priority fee percentile paid in recent blocks
+BASE_FEE_MULTIPLIER = 2  # Max fee = base fee * multiplier + priority fee
+
+# Pipelining settings
+TX_PER_WALLET = 1  # Transactions sent per wallet on each run
+MAX_IN_FLIGHT = 4  # Unconfirmed transactions allowed per wallet
+MAX_WORKERS = 8  # Wallets processed at the same time
+SIGNING_WORKERS = 0  # Signing processes, 0 signs on the wallet threads
+
+# Streaming settings (for very large wallet files)
+STREAM_CHUNK = 0  # Wallets prefetched and checked at a time, 0 runs the whole round at once
+STREAM_QUEUE = 0  # Wallets waiting for a free worker, 0 for twice MAX_WORKERS
+
+# Journal settings
+JOURNAL_FILE = "journal.db"  # Log of sent transactions for resume after a crash, None to turn off
+STUCK_SECONDS = 180  # Wait before a transaction without receipt is replaced
+FEE_BUMP = 1.2  # Fee multiplier for the replacement, 0 to never replace
 
-def load_wallets():
+# Metrics settings (written after every round, None to turn off)
+METRICS_FILE = None  # Prometheus text file, e.g. for the node_exporter textfile collector
+METRICS_JSON_FILE = None  # One JSON line with every metric per round
+TRACE_FILE = None  # One JSON line per transaction with its stage timings
+METRICS_PORT = None  # Serve /metrics for Prometheus on this port
+
+# Profiling settings (costs some throughput, None to turn off)
+PROFILE = None  # File prefix of the profile, e.g. "profile" writes profile.txt, profile.cpu.folded, ...
+PROFILE_MODE = "sample"  # "sample" (all threads, flamegraph stacks) or "cprofile" (pstats)
+PROFILE_INTERVAL = 0.01  # Seconds between stack samples
+
+def default_route():
+    """
+    The route described by the settings above
     """
-    Reads wallet information from wallet.txt file
+    return Route(
+        name="default",
+        chain_id=CHAIN_ID,
+        rpc_url=RPC_URL,
+        rpc_urls=list(RPC_URLS),
+        contract=CONTRACT_ADDRESS,
+        value=TX_VALUE,
+        wallet_file=WALLET_FILE,
+        journal_file=JOURNAL_FILE,
+    )
+
+def load_wallets(path=None):
+    """
+    Returns the wallets from wallet.txt file (WALLET_FILE)
     Format: address,private_key
+    The file is parsed and validated once and again only after it changes.
     """
-    wallets = []
+    path = path or WALLET_FILE
+    store = get_wallet_store(path)
     try:
-        with open("wallet.txt", "r") as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith("#"):
-                    parts = line.split(",")
-                    if len(parts) >= 2:
-                        address = parts[0].strip()
-                        private_key = parts[1].strip()
-                        wallets.append({
-                            "address": address,
-                            "private_key": private_key
-                        })
+        reloaded = store.reload_if_changed()
     except FileNotFoundError:
-        print("wallet.txt file not found!")
+        print(f"{path} file not found!")
         return []
-    return wallets
+    if reloaded:
+        for line_number, error in store.errors:
+            print(f"{path} line {line_number} skipped: {error}")
+    return store
 
 def get_gas_price(w3):
     """
@@ -50,194 +130,539 @@ def get_gas_price(w3):
         gas_price = w3.eth.gas_price
         return gas_price
     except Exception as e:
-        print(f"Gas price could not be retrieved, using default: {e}")
-        return 20000000000  # 20 Gwei
+        # A guessed price would send a bad transaction, so give up instead
+        count_error("gas_price", e)
+        print(f"Gas price could not be retrieved: {e}")
+        return None
+
+def get_fees(client, head=None):
+    """
+    Gets EIP-1559 fees, None means legacy gas price
+    """
+    if not USE_EIP1559 or GAS_PRICE:
+        return None
+    try:
+        oracle = get_fee_oracle(
+            client,
+            history_blocks=FEE_HISTORY_BLOCKS,
+            reward_percentile=FEE_PERCENTILE,
+            base_fee_multiplier=BASE_FEE_MULTIPLIER,
+        )
+        return oracle.quote(head)
+    except Exception as e:
+        print(f"Fee history could not be retrieved, using gas price: {e}")
+        return None
 
 def get_nonce(w3, address):
     """
     Gets wallet nonce value
     """
     try:
-        nonce = w3.eth.get_transaction_count(address)
+        nonce = w3.eth.get_transaction_count(address, "pending")
         return nonce
     except Exception as e:
+        count_error("nonce", e)
         print(f"Nonce could not be retrieved: {e}")
-        return 0
+        return None
 
-def create_transaction(w3, wallet, tx_data):
+def create_transaction(w3, wallet, tx_data, nonce=None, gas_price=None, fees=None,
+                       gas_cache=None, head=None, trace=None, route=None):
     """
-    Creates transaction
+    Creates transaction (type-2 when EIP-1559 fees are given)
     """
+    if route is None:
+        route = default_route()
     try:
-        # Get gas price
-        gas_price = GAS_PRICE or get_gas_price(w3)
-        
-        # Get nonce
-        nonce = get_nonce(w3, wallet["address"])
+        # Get nonce (only when no nonce manager provided one)
+        if nonce is None:
+            with Stage("nonce", trace):
+                nonce = get_nonce(w3, wallet["address"])
+            if nonce is None:
+                return None, None
         
         # Create transaction
         transaction = {
-            'to': CONTRACT_ADDRESS,
-            'value': 10913304046004750,  # In Wei
+            'to': route.contract,
+            'value': route.value,  # In Wei
             'gas': GAS_LIMIT,
-            'gasPrice': gas_price,
             'nonce': nonce,
             'data': tx_data,
-            'chainId': 17000  # Mainnet, for testnet use 11155111 (Sepolia)
+            'chainId': route.chain_id
         }
         
+        # Get gas limit from the estimate cache
+        if gas_cache is not None:
+            try:
+                with Stage("gas", trace):
+                    transaction['gas'] = gas_cache.gas_limit(transaction, wallet["address"], head)
+            except Exception as e:
+                count_error("gas", e)
+                print(f"Gas could not be estimated, using default: {e}")
+        
+        if fees is not None and not GAS_PRICE:
+            transaction.update(fees.transaction_fields())
+        else:
+            # Get gas price (only when the round prefetch had none)
+            with Stage("gas_price", trace):
+                transaction['gasPrice'] = GAS_PRICE or gas_price or get_gas_price(w3)
+            if transaction['gasPrice'] is None:
+                return None, nonce
+        
         return transaction, nonce
         
     except Exception as e:
+        count_error("build", e)
         print(f"Transaction could not be created: {e}")
-        return None, None
+        return None, nonce
 
-def send_transaction(w3, wallet, transaction):
+def send_transaction(w3, wallet, transaction, nonce_manager=None, signer=None, journal=None,
+                     trace=None):
     """
     Sends transaction
     """
     try:
-        # Sign transaction
-        signed_txn = w3.eth.account.sign_transaction(transaction, wallet["private_key"])
+        # Sign transaction (on the signing pool if there is one)
+        with Stage("sign", trace):
+            if signer is not None:
+                raw_transaction = signer.sign(wallet["address"], transaction, wallet["private_key"])
+            else:
+                raw_transaction = w3.eth.account.sign_transaction(
+                    transaction, wallet["private_key"]).raw_transaction
         
-        # Send transaction
-        tx_hash = w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+        tx_hash = "0x" + bytes(w3.keccak(raw_transaction)).hex()
+        if journal is not None:
+            # On disk before the node can have it, so a crash cannot lose it
+            with Stage("journal", trace):
+                journal.record_now(wallet["address"], transaction["nonce"], tx_hash, SENT,
+                                   transaction)
         
-        return tx_hash.hex()
+        # Send transaction
+        with Stage("broadcast", trace):
+            try:
+                w3.eth.send_raw_transaction(raw_transaction)
+            except Exception as e:
+                # "already known": the same bytes reached the node before
+                # (another endpoint of the pool), so this send went through
+                if "already known" not in str(e).lower():
+                    if journal is not None:
+                        journal.record(wallet["address"], transaction["nonce"], tx_hash, DROPPED)
+                    raise
+        IN_FLIGHT.inc()
+        if trace is not None:
+            trace.tx_hash = tx_hash
+        return tx_hash
         
     except Exception as e:
+        count_error("send", e)
         print(f"Transaction could not be sent: {e}")
+        if nonce_manager is not None:
+            nonce_manager.release(transaction["nonce"], e)
         return None
 
-def wait_for_transaction(w3, tx_hash, max_wait=300):
+def replace_transaction(w3, wallet, transaction, signer=None, journal=None, fees=None,
+                        trace=None):
     """
-    Waits for transaction confirmation
+    Sends a stuck transaction again with the same nonce and higher fees.
+    Returns (tx_hash, transaction) or None.
     """
-    print(f"Waiting for transaction: {tx_hash}")
-    
-    start_time = time.time()
-    while time.time() - start_time < max_wait:
+    replacement = bump_fees(transaction, FEE_BUMP, fees)
+    tx_hash = send_transaction(w3, wallet, replacement, signer=signer, journal=journal,
+                               trace=trace)
+    if not tx_hash:
+        return None
+    print(f"Stuck transaction replaced with higher fees: {tx_hash}")
+    return tx_hash, replacement
+
+def get_receipt_status(w3, tx_hash):
+    """
+    Checks a receipt once: True, False, or None if there is none
+    """
+    try:
+        receipt = w3.eth.get_transaction_receipt(tx_hash)
+    except Exception:
+        return None
+    return receipt['status'] == 1 if receipt else None
+
+def wait_for_transaction(w3, tx_hash, max_wait=300, tracker=None):
+    """
+    Waits for transaction confirmation. Prints nothing, the outcome ends
+    up in the wallet's WalletResult. Returns None if no receipt showed up
+    (dropped or still pending).
+    """
+    receipt = None
+    if tracker is not None:
+        # Shared block watcher, resolves about one block after inclusion
+        future = tracker.track(tx_hash)
         try:
-            receipt = w3.eth.get_transaction_receipt(tx_hash)
-            if receipt:
-                if receipt['status'] == 1:
-                    print(f"Transaction successful! Block: {receipt['blockNumber']}")
-                    return True
-                else:
-                    print(f"Transaction failed!")
-                    return False
-        except:
-            pass
-        
-        time.sleep(5)
+            receipt = future.result(timeout=max_wait)
+        except FutureTimeoutError:
+            tracker.forget(tx_hash)
+    else:
+        from web3.exceptions import TransactionNotFound
+        start_time = time.time()
+        while time.time() - start_time < max_wait:
+            try:
+                receipt = w3.eth.get_transaction_receipt(tx_hash)
+                if receipt:
+                    break
+            except TransactionNotFound:
+                pass
+            except Exception as e:
+                print(f"Receipt could not be retrieved: {e}")
+            
+            time.sleep(5)
     
-    print(f"Timeout! Transaction status could not be verified.")
-    return False
+    if receipt:
+        return receipt['status'] == 1
+    return None
+
+def build_tx_data(wallet_address, route=None):
+    """
+    Builds the transfer calldata for a wallet from the precompiled template
+    """
+    template = route.template if route is not None else TRANSFER_TEMPLATE
+    return template.build(wallet_address)
+
+def process_wallet(w3, wallet, count=None, snapshot=None, tracker=None, signer=None,
+                   fees=None, gas_cache=None, journal=None, route=None, pacer=None):
+    """
+    Sends count transactions from one wallet, keeping up to
+    MAX_IN_FLIGHT of them unconfirmed at the same time. A pacer
+    (pacing.SendPacer) spaces the sends.
+    """
+    if count is None:
+        count = TX_PER_WALLET
+    if snapshot is None:
+        snapshot = RoundSnapshot()
+    if route is None:
+        route = default_route()
+    result = WalletResult(address=wallet["address"])
+    manager = get_nonce_manager(w3, wallet["address"], MAX_IN_FLIGHT, route.chain_id)
+    pending_nonce = snapshot.nonce(wallet["address"])
+    if pending_nonce is not None:
+        manager.seed(pending_nonce)
+    pending = []
+    confirm_settings = dict(tracker=tracker, gas_cache=gas_cache, wallet=wallet, signer=signer,
+                            fees=fees, journal=journal)
+    for _ in range(count):
+        while pending and manager.available() == 0:
+            confirm_transaction(w3, manager, result, *pending.pop(0), **confirm_settings)
+        if pacer is not None:
+            pacer.wait(wallet["address"])
+        try:
+            tx_data = build_tx_data(wallet["address"], route)
+        except ValueError as e:
+            result.errors.append(str(e))
+            break
+        trace = Trace(wallet["address"])
+        try:
+            with Stage("nonce", trace):
+                nonce = manager.next_nonce()
+        except Exception as e:
+            count_error("nonce", e)
+            result.errors.append(f"Nonce could not be retrieved: {e}")
+            break
+        trace.nonce = nonce
+        transaction, nonce = create_transaction(w3, wallet, tx_data, nonce, snapshot.gas_price,
+                                                fees, gas_cache, snapshot.block_number, trace,
+                                                route)
+        if not transaction:
+            result.errors.append("Transaction could not be created.")
+            manager.release(nonce)
+            trace.finish("error")
+            continue
+        tx_hash = send_transaction(w3, wallet, transaction, manager, signer, journal, trace)
+        if not tx_hash:
+            result.errors.append("Transaction could not be sent.")
+            trace.finish("error")
+            continue
+        result.sent.append(tx_hash)
+        pending.append((nonce, tx_hash, transaction, trace))
+    while pending:
+        confirm_transaction(w3, manager, result, *pending.pop(0), **confirm_settings)
+    return result
 
-def main():
+def confirm_transaction(w3, manager, result, nonce, tx_hash, transaction, trace=None,
+                        tracker=None, gas_cache=None, wallet=None, signer=None, fees=None,
+                        journal=None, max_wait=None):
+    """
+    Waits for a sent transaction, frees its nonce and records the outcome.
+    A transaction still without receipt after max_wait (STUCK_SECONDS) is
+    replaced once with higher fees when the wallet is given.
+    """
+    if max_wait is None:
+        max_wait = STUCK_SECONDS
+    with Stage("confirm", trace):
+        status = wait_for_transaction(w3, tx_hash, max_wait, tracker)
+    # Hash that lost to tx_hash when a replacement was sent
+    replaced = None
+    if status is None and FEE_BUMP and wallet is not None and transaction is not None:
+        replacement = replace_transaction(w3, wallet, transaction, signer, journal, fees, trace)
+        if replacement is None:
+            # The replacement is refused once the old one is mined
+            status = get_receipt_status(w3, tx_hash)
+        else:
+            IN_FLIGHT.dec()
+            replaced, old_transaction = tx_hash, transaction
+            tx_hash, transaction = replacement
+            with Stage("confirm", trace):
+                status = wait_for_transaction(w3, tx_hash, STUCK_SECONDS, tracker)
+            if status is None:
+                # The old transaction can still be mined after the replacement was sent
+                old_status = get_receipt_status(w3, replaced)
+                if old_status is not None:
+                    print(f"Replaced transaction was mined instead: {replaced}")
+                    replaced, tx_hash = tx_hash, replaced
+                    transaction, status = old_transaction, old_status
+    IN_FLIGHT.dec()
+    outcome = DROPPED if status is None else CONFIRMED if status else FAILED
+    if trace is not None:
+        trace.finish(outcome)
+    if journal is not None:
+        # Written once settled, until then both are SENT for reconcile()
+        if replaced is not None:
+            journal.record(manager.address, nonce, replaced, DROPPED if status is None else REPLACED)
+        journal.record(manager.address, nonce, tx_hash, outcome)
+    if status is None:
+        manager.dropped(nonce)
+        result.dropped.append(tx_hash)
+    else:
+        manager.confirm(nonce)
+        if status:
+            result.confirmed.append(tx_hash)
+        else:
+            result.failed.append(tx_hash)
+            # A failed transaction may have run out of gas, estimate again
+            if gas_cache is not None:
+                gas_cache.invalidate(transaction)
+    return status
+
+def get_rpc_client(route=None):
+    """
+    Returns the shared RPC client for RPC_URL, or a pool if RPC_URLS
+    adds more endpoints. A route uses its own URLs.
+    """
+    settings = dict(pool_size=RPC_POOL_SIZE, timeout=RPC_TIMEOUT, retries=RPC_RETRIES,
+                    rate=RPC_RATE, burst=RPC_BURST)
+    urls = route.urls() if route is not None else list(dict.fromkeys([RPC_URL] + list(RPC_URLS)))
+    if len(urls) > 1:
+        return get_pool(urls, broadcast=RPC_BROADCAST, **settings)
+    return get_client(urls[0], **settings)
+
+def recover(client=None, route=None):
+    """
+    Resumes the transactions left unfinished in the journal by an earlier
+    process. Mined ones are settled with batched lookups, the rest are
+    waited for and replaced with higher fees once stuck.
+    Returns a WalletResult per wallet address.
+    """
+    if route is None:
+        route = default_route()
+    if not route.journal_file:
+        return []
+    if client is None:
+        client = get_rpc_client(route)
+    journal = get_journal(route.journal_file)
+    try:
+        pending = reconcile(client, journal, BATCH_SIZE)
+    except Exception as e:
+        print(f"Journal could not be reconciled: {e}")
+        return []
+    if not pending:
+        return []
+    print(f"Resuming {len(pending)} unfinished transactions from {route.journal_file}...")
+    # Only the wallets with something to resume are kept
+    addresses = {entry["address"] for entry in pending}
+    wallets = {wallet["address"].lower(): wallet for wallet in load_wallets(route.wallet_file)
+               if wallet["address"].lower() in addresses}
+    w3 = client.w3
+    tracker = get_receipt_tracker(client, RECEIPT_POLL_INTERVAL)
+    fees = get_fees(client)
+
+    def resume(entry):
+        wallet = wallets.get(entry["address"])
+        address = wallet["address"] if wallet is not None else entry["address"]
+        result = WalletResult(address=address, sent=[entry["tx_hash"]])
+        manager = get_nonce_manager(w3, address, MAX_IN_FLIGHT, route.chain_id)
+        age = time.time() - entry["time"]
+        IN_FLIGHT.inc()
+        confirm_transaction(w3, manager, result, entry["nonce"], entry["tx_hash"],
+                            entry["transaction"], Trace(address, entry["nonce"]),
+                            tracker=tracker, wallet=wallet, fees=fees, journal=journal,
+                            max_wait=max(STUCK_SECONDS - age, 0))
+        return result
+
+    results = run_wallets(pending, resume, MAX_WORKERS)
+    for result in results:
+        print(result.summary())
+    return results
+
+def check_wallets(client, wallets, snapshot, fees=None, gas_cache=None, route=None):
+    """
+    Pre-flight check of a round: drops wallets without enough balance and,
+    with SIMULATE on, wallets whose transaction would revert.
+    Returns (wallets to run, {address: skip reason}).
+    """
+    if not PREFLIGHT and not SIMULATE:
+        return wallets, {}
+    if route is None:
+        route = default_route()
+    gas_limit = GAS_LIMIT
+    if gas_cache is not None and len(wallets):
+        sample = wallets[0]
+        try:
+            gas_limit = gas_cache.gas_limit(
+                {'to': route.contract, 'value': route.value,
+                 'data': build_tx_data(sample["address"], route)},
+                sample["address"], snapshot.block_number)
+        except Exception as e:
+            print(f"Gas could not be estimated, using default: {e}")
+    if fees is not None and not GAS_PRICE:
+        max_fee = fees.max_fee_per_gas
+    else:
+        max_fee = GAS_PRICE or snapshot.gas_price
+    counts = {}
+    for wallet in wallets:
+        address = wallet["address"].lower()
+        counts[address] = counts.get(address, 0) + TX_PER_WALLET
+
+    def build_call(wallet):
+        return {
+            "from": wallet["address"],
+            "to": route.contract,
+            "value": hex(route.value),
+            "gas": hex(gas_limit),
+            "data": "0x" + build_tx_data(wallet["address"], route).hex(),
+        }
+
+    with Stage("preflight"):
+        return preflight(client, wallets, snapshot, route.value, gas_limit,
+                         max_fee if PREFLIGHT else None, counts,
+                         build_call if SIMULATE else None, BATCH_SIZE)
+
+def export_metrics():
+    """
+    Writes metrics and traces to the files set in the metrics settings
+    """
+    try:
+        if METRICS_FILE:
+            REGISTRY.write_prometheus(METRICS_FILE)
+        if METRICS_JSON_FILE:
+            REGISTRY.write_json_line(METRICS_JSON_FILE)
+        if TRACE_FILE:
+            TRACER.write(TRACE_FILE)
+    except OSError as e:
+        print(f"Metrics could not be written: {e}")
+
+def stream_round(client, wallets, tracker, signer, gas_cache, journal, route, max_workers,
+                 prefix="", pacer=None):
+    """
+    Runs a round over wallets STREAM_CHUNK at a time. Nonces, balances
+    and fees are fetched per chunk just before its wallets run, and only
+    the round totals are kept once a wallet is done.
+    """
+    w3 = client.w3
+
+    def chunks():
+        for chunk in wallets.chunks(STREAM_CHUNK):
+            snapshot = prefetch_round(client, [wallet["address"] for wallet in chunk], BATCH_SIZE)
+            fees = get_fees(client, snapshot.block_number)
+            ready, skipped = check_wallets(client, chunk, snapshot, fees, gas_cache, route)
+
+            def worker(wallet, snapshot=snapshot, fees=fees):
+                result = process_wallet(w3, wallet, snapshot=snapshot, tracker=tracker,
+                                        signer=signer, fees=fees, gas_cache=gas_cache,
+                                        journal=journal, route=route, pacer=pacer)
+                forget_nonce_manager(wallet["address"], route.chain_id)
+                return result
+
+            yield ready, worker, [WalletResult(address=address, skipped=reason)
+                                  for address, reason in skipped.items()]
+            if TRACE_FILE:
+                TRACER.write(TRACE_FILE)
+
+    return stream_wallets(chunks(), max_workers, STREAM_QUEUE,
+                          lambda result: print(prefix + result.summary()))
+
+def main(max_workers=None, client=None, route=None, pacer=None):
+    """
+    Runs one round over all wallets, several wallets at a time, on a
+    route (the settings above if none is given). A pacer spaces the sends.
+    Returns a WalletResult per wallet address, or only the RoundTotals
+    with STREAM_CHUNK set.
+    """
+    if PROFILE:
+        with profiled(PROFILE, PROFILE_MODE, PROFILE_INTERVAL):
+            return run_round(max_workers, client, route, pacer)
+    return run_round(max_workers, client, route, pacer)
+
+def run_round(max_workers=None, client=None, route=None, pacer=None):
+    """
+    One round of main(), without profiling
+    """
+    prefix = f"[{route.name}] " if route is not None else ""
+    if route is None:
+        route = default_route()
     try:
-        w3 = Web3(Web3.HTTPProvider(RPC_URL))
-        if not w3.is_connected():
+        if client is None:
+            client = get_rpc_client(route)
+        w3 = client.w3
+        if not client.is_connected():
             print("Web3 connection could not be established!")
-            return
+            return []
     except Exception as e:
         print(f"Web3 connection error: {e}")
-        return
-    wallets = load_wallets()
+        return []
+    wallets = load_wallets(route.wallet_file)
     if not wallets:
         print("No wallets found!")
-        return
-    for wallet in wallets:
-        try:
-            current_time = int(time.time())
-            deadline = current_time + (72 * 3600)
-            wallet_address = wallet["address"]
-            formatted_signature = "0" * 64
-            tx_data = (
-                "0xff0d7c2f"
-                + "0000000000000000000000000000000000000000000000000000000000000002"
-                + "0000000000000000000000000000000000000000000000000000000000000000"
-                + f"{deadline:064x}"
-                + formatted_signature
-                + "00000000000000000000000000000000000000000000000000000000000000a0"
-                + "0000000000000000000000000000000000000000000000000000000000000000"
-                + "0000000000000000000000000000000000000000000000000000000000000002"
-                + "0000000000000000000000000000000000000000000000000000000000000060"
-                + "0000000000000000000000000000000000000000000000000000000000000700"
-                + "0000000000000000000000000000000000000000000000000000000000000020"
-                + "0000000000000000000000000000000000000000000000000000000000000002"
-                + "0000000000000000000000000000000000000000000000000000000000000040"
-                + "0000000000000000000000000000000000000000000000000000000000000380"
-                + "0000000000000000000000000000000000000000000000000000000000000001"
-                + "0000000000000000000000000000000000000000000000000000000000000003"
-                + "0000000000000000000000000000000000000000000000000000000000000060"
-                + "00000000000000000000000000000000000000000000000000000000000002c0"
-                + "0000000000000000000000000000000000000000000000000000000000000140"
-                + "0000000000000000000000000000000000000000000000000000000000000180"
-                + "00000000000000000000000000000000000000000000000000000000000001c0"
-                + "00000000000000000000000000000000000000000000000000038d7ea4c68000"
-                + "0000000000000000000000000000000000000000000000000000000000000200"
-                + "0000000000000000000000000000000000000000000000000000000000000240"
-                + "0000000000000000000000000000000000000000000000000000000000000012"
-                + "0000000000000000000000000000000000000000000000000000000000000000"
-                + "0000000000000000000000000000000000000000000000000000000000000280"
-                + "00000000000000000000000000000000000000000000000000038d7ea4c68000"
-                + "0000000000000000000000000000000000000000000000000000000000000014"
-                + wallet_address[2:].zfill(64)
-                + "0000000000000000000000000000000000000000000000000000000000000014"
-                + wallet_address[2:].zfill(64)
-                + "0000000000000000000000000000000000000000000000000000000000000014"
-                + "eeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeee000000000000000000000000"
-                + "0000000000000000000000000000000000000000000000000000000000000003"
-                + "4554480000000000000000000000000000000000000000000000000000000000"
-                + "0000000000000000000000000000000000000000000000000000000000000005"
-                + "4574686572000000000000000000000000000000000000000000000000000000"
-                + "0000000000000000000000000000000000000000000000000000000000000014"
-                + "f6E7E2725b40EC8226036906cAb0f5dC3722b8E7000000000000000000000000"
-                + "0000000000000000000000000000000000000000000000000000000000000001"
-                + "0000000000000000000000000000000000000000000000000000000000000003"
-                + "0000000000000000000000000000000000000000000000000000000000000060"
-                + "00000000000000000000000000000000000000000000000000000000000002c0"
-                + "0000000000000000000000000000000000000000000000000000000000000140"
-                + "0000000000000000000000000000000000000000000000000000000000000180"
-                + "00000000000000000000000000000000000000000000000000000000000001c0"
-                + "000000000000000000000000000000000000000000000000000002e406abe040"
-                + "0000000000000000000000000000000000000000000000000000000000000200"
-                + "0000000000000000000000000000000000000000000000000000000000000240"
-                + "0000000000000000000000000000000000000000000000000000000000000012"
-                + "0000000000000000000000000000000000000000000000000000000000000000"
-                + "0000000000000000000000000000000000000000000000000000000000000280"
-                + "0000000000000000000000000000000000000000000000000000000000000000"
-                + "0000000000000000000000000000000000000000000000000000000000000014"
-                + wallet_address[2:].zfill(64)
-                + "0000000000000000000000000000000000000000000000000000000000000014"
-                + wallet_address[2:].zfill(64)
-                + "0000000000000000000000000000000000000000000000000000000000000014"
-                + "eeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeee000000000000000000000000"
-                + "0000000000000000000000000000000000000000000000000000000000000003"
-                + "4554480000000000000000000000000000000000000000000000000000000000"
-                + "0000000000000000000000000000000000000000000000000000000000000005"
-                + "4574686572000000000000000000000000000000000000000000000000000000"
-                + "0000000000000000000000000000000000000000000000000000000000000014"
-                + "f6E7E2725b40EC8226036906cAb0f5dC3722b8E7000000000000000000000000"
-            )
-            print("Sending transaction...")
-            transaction, nonce = create_transaction(w3, wallet, tx_data)
-            if not transaction:
-                print("Transaction could not be created.")
-                continue
-            tx_hash = send_transaction(w3, wallet, transaction)
-            if not tx_hash:
-                print("Transaction could not be sent.")
-                continue
-            print("Transaction sent, waiting for confirmation...")
-            result = wait_for_transaction(w3, tx_hash)
-            if result:
-                print("Transaction confirmed.")
-            else:
-                print("Transaction not confirmed.")
-        except Exception as e:
-            print(f"Error in transaction: {e}")
+        return []
+    if max_workers is None:
+        max_workers = MAX_WORKERS
+    TRACER.enabled = bool(TRACE_FILE)
+    if METRICS_PORT:
+        serve_metrics(METRICS_PORT)
+    client.probe()
+    tracker = get_receipt_tracker(client, RECEIPT_POLL_INTERVAL)
+    gas_cache = get_gas_cache(client, margin=GAS_MARGIN, ttl_blocks=GAS_CACHE_BLOCKS) \
+        if ESTIMATE_GAS else None
+    journal = get_journal(route.journal_file) if route.journal_file else None
+    if STREAM_CHUNK:
+        # Streamed wallets send their key along instead of every key going to the workers
+        signer = get_signing_pool([], SIGNING_WORKERS, route.name) if SIGNING_WORKERS else None
+        totals = stream_round(client, wallets, tracker, signer, gas_cache, journal, route,
+                              max_workers, prefix, pacer)
+        print(prefix + totals.summary())
+        finish_round(client, prefix)
+        return totals
+    # One batched lookup of gas price, nonces and balances for the whole round
+    snapshot = prefetch_round(client, [wallet["address"] for wallet in wallets], BATCH_SIZE)
+    fees = get_fees(client, snapshot.block_number)
+    signer = get_signing_pool(wallets, SIGNING_WORKERS, route.name) if SIGNING_WORKERS else None
+    wallets, skipped = check_wallets(client, wallets, snapshot, fees, gas_cache, route)
+    results = run_wallets(
+        wallets,
+        lambda wallet: process_wallet(w3, wallet, snapshot=snapshot, tracker=tracker,
+                                      signer=signer, fees=fees, gas_cache=gas_cache,
+                                      journal=journal, route=route, pacer=pacer),
+        max_workers,
+    )
+    results += [WalletResult(address=address, skipped=reason) for address, reason in skipped.items()]
+    for result in results:
+        print(prefix + result.summary())
+    finish_round(client, prefix)
+    return results
+
+def finish_round(client, prefix=""):
+    """
+    Prints the RPC and stage statistics and exports the metrics
+    """
+    for line in format_stats(client.stats()):
+        print(prefix + line)
+    summary = stage_summary()
+    if summary:
+        print(summary)
+    export_metrics()
 
 if __name__ == "__main__":
     main()
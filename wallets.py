@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+
+from eth_utils import to_checksum_address
+
+ADDRESS_SIZE = 20
+KEY_SIZE = 32
+
+class Wallet:
+    """
+    One wallet, readable as wallet.address or wallet["address"]
+    """
+    __slots__ = ("address", "private_key")
+
+    def __init__(self, address, private_key):
+        self.address = address
+        self.private_key = private_key
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __repr__(self):
+        return f"Wallet({self.address})"
+
+def parse_line(line, known_keys=None):
+    """
+    Validates one address,private_key line and returns the raw
+    (address, key) bytes. Raises ValueError on a bad line.
+    """
+    parts = line.split(",")
+    if len(parts) < 2:
+        raise ValueError("expected address,private_key")
+    address, private_key = parts[0].strip(), parts[1].strip()
+    if not address.startswith("0x") or len(address) != 42:
+        raise ValueError(f"invalid address {address!r}")
+    if private_key.startswith("0x"):
+        private_key = private_key[2:]
+    if len(private_key) != 2 * KEY_SIZE:
+        raise ValueError("private key must be 64 hex characters")
+    try:
+        address_raw = bytes.fromhex(address[2:])
+        key_raw = bytes.fromhex(private_key)
+    except ValueError:
+        raise ValueError("address and private key must be hex")
+    derived = known_keys.get(key_raw) if known_keys else None
+    if derived is None:
+        from eth_keys import keys
+        try:
+            derived = keys.PrivateKey(key_raw).public_key.to_canonical_address()
+        except Exception as e:
+            raise ValueError(f"invalid private key: {e}")
+    if derived != address_raw:
+        raise ValueError(f"private key does not belong to {address}")
+    return address_raw, key_raw
+
+class WalletStore:
+    """
+    Wallets parsed and validated once from wallet.txt and kept as packed
+    bytes. The file is parsed again only when its mtime changes.
+    """
+
+    def __init__(self, path="wallet.txt"):
+        self.path = path
+        self.errors = []
+        self._addresses = bytearray()
+        self._keys = bytearray()
+        # Addresses listed more than once: first index -> every index
+        self._repeats = {}
+        self._later = set()
+        self._stamp = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._addresses) // ADDRESS_SIZE
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __iter__(self):
+        return self.iter_range(0, len(self))
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        a = index * ADDRESS_SIZE
+        k = index * KEY_SIZE
+        return Wallet(
+            to_checksum_address(bytes(self._addresses[a:a + ADDRESS_SIZE])),
+            "0x" + self._keys[k:k + KEY_SIZE].hex(),
+        )
+
+    def iter_range(self, start, stop, step=1):
+        """
+        Yields wallets one at a time, nothing is built up front
+        """
+        for index in range(start, min(stop, len(self)), step):
+            yield self[index]
+
+    def shard(self, index, count):
+        """
+        Yields every count-th wallet starting at index
+        """
+        return self.iter_range(index, len(self), count)
+
+    def chunks(self, size):
+        """
+        Yields lists of about size wallets. Every entry of an address goes
+        in the chunk of its first one, so no address is in two chunks.
+        """
+        chunk = []
+        for index in range(len(self)):
+            if index in self._later:
+                continue
+            chunk.extend(self[i] for i in self._repeats.get(index, (index,)))
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _file_stamp(self):
+        stat = os.stat(self.path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def reload_if_changed(self):
+        """
+        Parses the file again if it changed since the last load.
+        Returns True if it was parsed.
+        """
+        with self._lock:
+            stamp = self._file_stamp()
+            if stamp == self._stamp:
+                return False
+            self._load(stamp)
+            return True
+
+    def _load(self, stamp):
+        # Keys validated on the previous load skip address derivation
+        known = {}
+        for index in range(len(self)):
+            known[bytes(self._keys[index * KEY_SIZE:(index + 1) * KEY_SIZE])] = \
+                bytes(self._addresses[index * ADDRESS_SIZE:(index + 1) * ADDRESS_SIZE])
+        addresses = bytearray()
+        private_keys = bytearray()
+        errors = []
+        first = {}
+        repeats = {}
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                try:
+                    address_raw, key_raw = parse_line(line, known)
+                except ValueError as e:
+                    errors.append((line_number, str(e)))
+                    continue
+                index = len(addresses) // ADDRESS_SIZE
+                addresses += address_raw
+                private_keys += key_raw
+                first_index = first.setdefault(address_raw, index)
+                if first_index != index:
+                    repeats.setdefault(first_index, [first_index]).append(index)
+        self._addresses = addresses
+        self._keys = private_keys
+        self._repeats = repeats
+        self._later = {index for indexes in repeats.values() for index in indexes[1:]}
+        self.errors = errors
+        self._stamp = stamp
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_wallet_store(path="wallet.txt"):
+    """
+    Returns the shared wallet store for a file. Call reload_if_changed()
+    on it before use.
+    """
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = WalletStore(path)
+            _stores[path] = store
+        return store